@@ -0,0 +1,247 @@
+from typing import Iterator, List, Tuple
+from .constants import BLACK, COLS, ROWS, WHITE
+from .move import Move
+from .piece import BLACK_KING, BLACK_MAN, WHITE_KING, WHITE_MAN
+from .squares import DIRECTIONS, RAYS, ROWCOL, SQUARE, SQUARES
+
+# every playable square set
+FULL = (1 << SQUARES) - 1
+
+# squares on which a piece of given color is made a king
+PROMOTION_ROW = {
+    WHITE: sum(1 << SQUARE[0][col] for col in range(COLS) if SQUARE[0][col] is not None),
+    BLACK: sum(1 << SQUARE[ROWS - 1][col] for col in range(COLS) if SQUARE[ROWS - 1][col] is not None),
+}
+
+
+# yields the square numbers of all set bits of the mask
+def bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# counts set bits of the mask
+def count(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+# Compact board for the engine. The position is kept in four integers, one bit per playable square,
+# with the same rules as checkers.board.Board
+class BitBoard:
+    __slots__ = ('white_men', 'white_kings', 'black_men', 'black_kings', 'king_moves', 'history')
+
+    def __init__(self, white_men: int = 0, white_kings: int = 0, black_men: int = 0, black_kings: int = 0, king_moves: int = 0) -> None:
+        self.white_men = white_men
+        self.white_kings = white_kings
+        self.black_men = black_men
+        self.black_kings = black_kings
+        self.king_moves = king_moves
+        # (king_moves, captured kings) of every made move, needed to unmake it
+        self.history = []
+
+    # create the initial board setup with white pieces on the bottom and black on the top
+    @classmethod
+    def create_board(cls) -> 'BitBoard':
+        black = sum(1 << square for square, (row, _) in enumerate(ROWCOL) if row < ROWS//2 - 1)
+        white = sum(1 << square for square, (row, _) in enumerate(ROWCOL) if row > ROWS//2)
+        return cls(white_men=white, black_men=black)
+
+    # creates a bitboard from the pieces of a Board
+    @classmethod
+    def from_board(cls, board: object) -> 'BitBoard':
+        bitboard = cls(king_moves=board.king_moves)
+        for square, code in enumerate(board.squares):
+            bit = 1 << square
+            if code == WHITE_MAN:
+                bitboard.white_men |= bit
+            elif code == WHITE_KING:
+                bitboard.white_kings |= bit
+            elif code == BLACK_MAN:
+                bitboard.black_men |= bit
+            elif code == BLACK_KING:
+                bitboard.black_kings |= bit
+        return bitboard
+
+    # creates a Board with the same pieces as this bitboard
+    def to_board(self) -> object:
+        from .board import Board
+
+        board = Board()
+        board.squares = bytearray(SQUARES)
+        for mask, code in ((self.white_men, WHITE_MAN), (self.white_kings, WHITE_KING),
+                           (self.black_men, BLACK_MAN), (self.black_kings, BLACK_KING)):
+            for square in bits(mask):
+                board.squares[square] = code
+
+        board.king_moves = self.king_moves
+        board.recalculate()
+        return board
+
+    @property
+    def white_left(self) -> int:
+        return count(self.white_men | self.white_kings)
+
+    @property
+    def black_left(self) -> int:
+        return count(self.black_men | self.black_kings)
+
+    # returns all pieces on the board as a mask
+    def occupied(self) -> int:
+        return self.white_men | self.white_kings | self.black_men | self.black_kings
+
+    # returns the men and the kings masks of the passed side
+    def side(self, color: tuple) -> Tuple[int, int]:
+        if color == WHITE:
+            return self.white_men, self.white_kings
+        return self.black_men, self.black_kings
+
+    # checks for a tie condition, 30 consecutive moves with a king piece without skipping are considered a tie
+    def is_tie(self) -> bool:
+        return self.king_moves >= 30
+
+    # checks for winning conditions, current player wins if the next player has no pieces or no moves left
+    def is_won(self, current_player: tuple) -> bool:
+        next_player = BLACK if current_player == WHITE else WHITE
+        men, kings = self.side(next_player)
+        if not men | kings:
+            return True
+        return not self.get_valid_moves(next_player)[0]
+
+    # returns all moves of the passed side and information if they are skips.
+    # Skips are obligatory, so if any piece can skip only the skips are returned,
+    # each of them with the whole multi-jump sequence until no more skips are available
+    def get_valid_moves(self, color: tuple) -> Tuple[List[Move], bool]:
+        men, kings = self.side(color)
+        opponent_men, opponent_kings = self.side(BLACK if color == WHITE else WHITE)
+        opponents = opponent_men | opponent_kings
+        empty = FULL & ~self.occupied()
+        promotion_row = PROMOTION_ROW[color]
+
+        skips = []
+        for square in bits(men):
+            self._find_skips((square,), (), False, opponents, empty, promotion_row, skips)
+        for square in bits(kings):
+            self._find_skips((square,), (), True, opponents, empty, promotion_row, skips)
+        if skips:
+            return skips, True
+
+        moves = []
+        # men only move forward, white pieces go up the board and black pieces go down
+        forward = -1 if color == WHITE else 1
+        for square in bits(men):
+            for (row_dir, _), ray in zip(DIRECTIONS, RAYS[square]):
+                if row_dir == forward and ray and empty >> ray[0] & 1:
+                    moves.append(Move((square, ray[0]), (), bool(promotion_row >> ray[0] & 1)))
+
+        # kings move any number of empty squares in every direction
+        for square in bits(kings):
+            for ray in RAYS[square]:
+                for target in ray:
+                    if not empty >> target & 1:
+                        break
+                    moves.append(Move((square, target)))
+
+        return moves, False
+
+    # recursively follows every skip from the last square of the path, skipped pieces are removed
+    # from the board as they are jumped over. Finished sequences are appended to skips.
+    # Returns True if any skip was found from the last square of the path
+    def _find_skips(self, path: tuple, captured: tuple, king: bool, opponents: int, empty: int, promotion_row: int, skips: list) -> bool:
+        square = path[-1]
+        found = False
+        for ray in RAYS[square]:
+            # a king can skip a piece at any distance on the diagonal, a man only the nearest one
+            index = 0
+            if king:
+                while index < len(ray) and empty >> ray[index] & 1:
+                    index += 1
+            if index + 1 >= len(ray) or not opponents >> ray[index] & 1:
+                continue
+
+            target = ray[index]
+            for landing in ray[index + 1:]:
+                if not empty >> landing & 1:
+                    break
+                found = True
+                new_path = path + (landing,)
+                new_captured = captured + (target,)
+                # the square the piece left and the skipped piece are now empty, the landing square is taken
+                new_empty = (empty | 1 << square | 1 << target) & ~(1 << landing)
+                if not self._find_skips(new_path, new_captured, king, opponents & ~(1 << target), new_empty, promotion_row, skips):
+                    promotion = not king and bool(promotion_row >> landing & 1)
+                    skips.append(Move(new_path, new_captured, promotion))
+                # a man can only land right behind the skipped piece
+                if not king:
+                    break
+
+        return found
+
+    # makes the move on the board
+    def make_move(self, move: Move) -> None:
+        start = 1 << move.path[0]
+        end = 1 << move.path[-1]
+        captured = 0
+        for square in move.captured:
+            captured |= 1 << square
+
+        # move the piece and remove all skipped pieces, remembering which of them were kings
+        if (self.white_men | self.white_kings) & start:
+            king = self.white_kings & start
+            captured_kings = self.black_kings & captured
+            self.black_men &= ~captured
+            self.black_kings &= ~captured
+            if king:
+                self.white_kings = self.white_kings & ~start | end
+            elif move.promotion:
+                self.white_men &= ~start
+                self.white_kings |= end
+            else:
+                self.white_men = self.white_men & ~start | end
+        else:
+            king = self.black_kings & start
+            captured_kings = self.white_kings & captured
+            self.white_men &= ~captured
+            self.white_kings &= ~captured
+            if king:
+                self.black_kings = self.black_kings & ~start | end
+            elif move.promotion:
+                self.black_men &= ~start
+                self.black_kings |= end
+            else:
+                self.black_men = self.black_men & ~start | end
+
+        self.history.append((self.king_moves, captured_kings))
+        # if a moved piece is a king piece and no skip has been done then increase the "tie" counter else zero it
+        if king and not captured:
+            self.king_moves += 1
+        else:
+            self.king_moves = 0
+
+    # takes back the last made move, which has to be the passed move
+    def unmake_move(self, move: Move) -> None:
+        start = 1 << move.path[0]
+        end = 1 << move.path[-1]
+        captured = 0
+        for square in move.captured:
+            captured |= 1 << square
+        self.king_moves, captured_kings = self.history.pop()
+
+        # put the piece back, a promoted piece goes back as a man, and return the skipped pieces
+        if (self.white_men | self.white_kings) & end:
+            if self.white_kings & end and not move.promotion:
+                self.white_kings = self.white_kings & ~end | start
+            else:
+                self.white_kings &= ~end
+                self.white_men = self.white_men & ~end | start
+            self.black_men |= captured & ~captured_kings
+            self.black_kings |= captured_kings
+        else:
+            if self.black_kings & end and not move.promotion:
+                self.black_kings = self.black_kings & ~end | start
+            else:
+                self.black_kings &= ~end
+                self.black_men = self.black_men & ~end | start
+            self.white_men |= captured & ~captured_kings
+            self.white_kings |= captured_kings
@@ -1,41 +1,40 @@
 from functools import cached_property, lru_cache
-import pygame
-import numpy as np
-from .piece import Piece
-from .constants import BLACK, DARK_BROWN, LIGHT_BROWN, ROWS, SQUARE_SIZE, COLS, WHITE
-from collections import defaultdict
-from random import choice
-from typing import Tuple
+from .piece import (BLACK_KING, BLACK_MAN, BLACK_PIECE, COLOR, EMPTY, KING, SIDE, SIDES, WHITE_KING, WHITE_MAN,
+                    WHITE_PIECE, Piece)
+from .move import Move
+from .squares import DIRECTIONS, RAYS, ROWCOL, SQUARE, SQUARES
+from .weights import WEIGHTS, Weights
+from .zobrist import PIECE_KEYS, SIDE_KEYS
+from .constants import BLACK, ROWS, COLS, WHITE
+from typing import List, Tuple
+
+# zobrist keys of every piece code
+KEYS = {code: PIECE_KEYS[COLOR[code & SIDES], bool(code & KING)] for code in (WHITE_MAN, WHITE_KING, BLACK_MAN, BLACK_KING)}
+
+# distance of every square to the promotion row of each side, the row a man of each side becomes a king on
+# and the row direction it moves in
+DIST_TO_KING = {WHITE_PIECE: tuple(row for row, _ in ROWCOL), BLACK_PIECE: tuple(ROWS - row - 1 for row, _ in ROWCOL)}
+PROMOTION_ROW = {WHITE_PIECE: 0, BLACK_PIECE: ROWS - 1}
+DIRECTION = {WHITE_PIECE: -1, BLACK_PIECE: 1}
 
 
 class Board:
     def __init__(self):
-        self.board = []
-        self.skipped = False
+        # code of the piece on every playable square (see checkers.piece), so a position is a 50 byte buffer
+        # and copying the board copies just the buffer
+        self.squares = bytearray(SQUARES)
         self.king_moves = 0
+        # (king_moves, codes of the removed pieces) of every move made with make_move, needed to take it back
+        self.history = []
+        # zobrist hash of the pieces on the board, updated with every change of the board
+        self.hash = 0
 
-        # create a background checkerboard pattern of 0 and 1
-        self.background = np.zeros((ROWS, COLS))
-        self.background[1::2, ::2] = 1
-        self.background[::2, 1::2] = 1
-
-        # initial ammount of white/black pieces and the number of kings
+        # initial ammount of white/black pieces, the number of kings and the summed distance of pieces to becoming a king
         self.black_left = self.white_left = (ROWS - 2)//2*COLS//2
         self.black_kings = self.white_kings = 0
+        self.black_dist = self.white_dist = 0
         self.create_board()
     
-    # draw a colorful checkerboard as a background
-    def draw_checkerboard(self, window) -> None:       
-        window.fill(BLACK)
-        for row in range(ROWS):
-            for col in range(COLS):
-                if self.background[row][col] == 1:
-                    pygame.draw.rect(
-                        window, DARK_BROWN, (row*SQUARE_SIZE, col*SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-                else:
-                    pygame.draw.rect(
-                        window, LIGHT_BROWN, (row*SQUARE_SIZE, col*SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
     # checks for a tie condition
     def is_tie(self) -> bool:
         # 30 consecutive moves with a king piece without skipping are considered a tie
@@ -59,273 +58,288 @@ class Board:
             return True
 
         # if there are no moves available for the next player, current player wins
-        next_player_moves = self.get_valid_moves(next_player)[0]
-        for move in next_player_moves.keys():
-            if next_player_moves[move].keys():
-                return False
-        
-        return True
+        return not self.get_valid_moves(next_player)[0]
         
-    # evaluation function for the current board state
-    def evaluate(self) -> float:
-        # if win for black evaluation is -infinity
-        if self.is_won(BLACK):
+    # evaluation function for the current board state. It only uses counters kept up to date by the board changes,
+    # positions without moves are found by the search when it generates the moves. The evaluation depends only
+    # on the position and the weights of its terms, randomness of the AI comes from minimax.selection
+    def evaluate(self, weights: Weights = WEIGHTS) -> float:
+        # if black has taken all white pieces evaluation is -infinity
+        if self.white_left == 0:
             return float('-inf')
-        # if win for white evaluation is +infinity
-        elif self.is_won(WHITE):
+        # if white has taken all black pieces evaluation is +infinity
+        elif self.black_left == 0:
             return float('inf')
         # if board state is a tie then evaluation is 0 - draw
         elif self.is_tie():
             return 0
 
-        # random component of the evaluation to make the game less deterministic
-        random_eval = choice([-0.1, 0.1])
-        sum_king_dist_white = 0 
-        sum_king_dist_black = 0
-
-        whites = self.get_all_side_pieces(WHITE)
-        blacks = self.get_all_side_pieces(BLACK)
-
+        return sum(self.evaluation_terms(weights).values())
+
+    # returns the evaluation of the current board state split into its terms
+    def evaluation_terms(self, weights: Weights = WEIGHTS) -> dict:
+        features = self.evaluation_features()
+        return {
+            'pieces': weights.man*features['pieces'],
+            'kings': weights.king*features['kings'],
+            'white_king_distance': weights.distance*features['white_king_distance'],
+            'black_king_distance': weights.distance*features['black_king_distance'],
+        }
+
+    # returns the terms of the evaluation before they are weighted, the evaluation is linear in them
+    # so the weights can be tuned on the features of many positions
+    def evaluation_features(self) -> dict:
         # calculation of the average distance of all pieces to the edge of the oponent side (making a king)
         # less the absolute value for each player the better the evaluation for that player.
         # This encourages moving more pieces and trying to take control of the centre instead 
-        # of pushing just one piece.
-        for piece in whites: 
-            sum_king_dist_white += piece.dist_to_king
-        for piece in blacks: 
-            sum_king_dist_black += piece.dist_to_king
-        
-        # creating a weight of 2 for the distance
-        average_king_dist_white = 2*(len(whites)*ROWS - (sum_king_dist_white / len(whites)))
-        average_king_dist_black = (-2)*(len(whites)*ROWS - (sum_king_dist_black / len(blacks)))
-
-        # number of pieces are evaluated at 3 points per normal piece, 5 per king piece. 
-        # weight of the total pieces is 5 on top of that. 
-        total_pieces = 3*self.white_left - 3*self.black_left + (5*self.white_kings - 5*self.black_kings)
-        return 5*total_pieces + 2*(average_king_dist_black) + 2*average_king_dist_white + random_eval
-
-    # returns all pieces of the passed side as a list
-    def get_all_side_pieces(self, color: tuple) -> list:
-        pieces = []
-        for row in self.board:
-            for piece in row:
-                if piece != 0 and piece.color == color:
-                    pieces.append(piece)
-        return pieces
-
-    # move function for the pieces on the board
-    def move(self, piece: object, new_row: int, new_col: int) -> None:
-        # swap position of a piece with empty space, returns True if King has been made to end turn
-        self.board[piece.row][piece.col], self.board[new_row][new_col] = self.board[new_row][new_col], self.board[piece.row][piece.col]
-        
-        # change the row and col values of a Piece object
-        piece.move(new_row, new_col)
+        # of pushing just one piece
+        average_king_dist_white = self.white_left*ROWS - (self.white_dist / self.white_left)
+        average_king_dist_black = (-1)*(self.black_left*ROWS - (self.black_dist / self.black_left))
+
+        # number of pieces, every king is counted once more on top of its piece
+        return {
+            'pieces': self.white_left - self.black_left,
+            'kings': self.white_kings - self.black_kings,
+            'white_king_distance': average_king_dist_white,
+            'black_king_distance': average_king_dist_black,
+        }
+
+    # moves the piece from the start square to the empty end square
+    def move(self, start: int, end: int) -> None:
+        squares = self.squares
+        code = squares[start]
+        squares[start], squares[end] = EMPTY, code
+
+        keys = KEYS[code]
+        self.hash ^= keys[start] ^ keys[end]
+
+        side = code & SIDES
+        dist = DIST_TO_KING[side]
+        if side == WHITE_PIECE:
+            self.white_dist += dist[end] - dist[start]
+        else:
+            self.black_dist += dist[end] - dist[start]
+
+    # makes the whole move, including every skip of a multi-jump and a promotion, so that it can be taken back with unmake_move
+    def make_move(self, move: Move) -> None:
+        start, end = move.path[0], move.path[-1]
+        code = self.squares[start]
+        king_moves = self.king_moves
+
+        # skipped pieces are removed before the piece lands, as it can land on a square of a piece it skipped earlier
+        removed = bytes(self.squares[square] for square in move.captured) if move.captured else b''
+        for square in move.captured:
+            self.remove_piece(square)
+        self.history.append((king_moves, removed))
+
+        self.move(start, end)
+        if move.promotion:
+            self.make_king(end)
 
         # if a moved piece is a king piece and no skip has been done then increase the "tie" counter else zero it
-        if piece.king and not self.skipped:
-            self.king_moves += 1
+        if code & KING and not move.captured:
+            self.king_moves = king_moves + 1
         else:
-            self.king_moves = 0 
-
-    # if conditions are met, changes a piece to a king piece
-    def make_king(self, piece: object, new_row: int) -> None:
-        # if passed piece is an instance of a Piece class
-        if piece != 0:
-            # if not already a king piece and on the opposite end of the board, change a piece to a king
-            if new_row == 0 and piece.color == WHITE and piece.king == False:
-                piece.make_king()
-                self.white_kings += 1
+            self.king_moves = 0
+
+    # takes back the last move made with make_move, which has to be the passed move
+    def unmake_move(self, move: Move) -> None:
+        start, end = move.path[0], move.path[-1]
+        king_moves, removed = self.history.pop()
+
+        if move.promotion:
+            self.unmake_king(end)
+        self.move(end, start)
+        for square, code in zip(move.captured, removed):
+            self.restore_piece(square, code)
+        self.king_moves = king_moves
+
+    # changes the man on the square to a king
+    def make_king(self, square: int) -> None:
+        code = self.squares[square]
+        self.squares[square] = code | KING
+        self.hash ^= KEYS[code][square] ^ KEYS[code | KING][square]
+        if code & WHITE_PIECE:
+            self.white_kings += 1
+        else:
+            self.black_kings += 1
+
+    # changes a promoted king on the square back to a normal piece
+    def unmake_king(self, square: int) -> None:
+        code = self.squares[square]
+        self.squares[square] = code & ~KING
+        self.hash ^= KEYS[code][square] ^ KEYS[code & ~KING][square]
+        if code & WHITE_PIECE:
+            self.white_kings -= 1
+        else:
+            self.black_kings -= 1
 
-            elif new_row == ROWS - 1 and piece.color == BLACK and piece.king == False:
-                piece.make_king()
-                self.black_kings += 1
-        
     # returns either 0 for empty space, and an instance of Piece class if a piece
-    def get_piece(self, row: int, col: int) -> object:        
-        return self.board[row][col]
+    def get_piece(self, row: int, col: int) -> object:
+        square = SQUARE[row][col]
+        if square is None or self.squares[square] == EMPTY:
+            return 0
+        return Piece.from_code(row, col, self.squares[square])
 
     # create the initial board setup with white pieces on the bottom and black on the top
     def create_board(self) -> None:
-        # couldn't make np.array work with both int and object types in the same array
-        for row in range(ROWS):
-            self.board.append([])
-            for col in range(COLS): 
-                # in a checkerboard pattern create pieces, if first half of the board then black else white, if empty then 0
-                if col % 2 == ((row + 1) % 2):
-                    if row < ROWS//2 - 1:
-                        self.board[row].append(Piece(row, col, BLACK))
-                    elif row > ROWS//2:
-                        self.board[row].append(Piece(row, col, WHITE))
-                    else:
-                        self.board[row].append(0)
-                else:
-                    self.board[row].append(0)
-
-    # draw the window function
-    def draw(self, window):
-        # redraw the background
-        self.draw_checkerboard(window)
-        # draw only the pieces
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board[row][col]
-                if piece != 0:
-                    piece.draw(window)
-
-    # returns possible moves for all pieces of passed player(color), and information if a move involves a skip
-    def get_valid_moves(self, color: tuple) -> Tuple[dict, bool]:
-        # moves is a dictionary which keys are an instance of a Piece class of "color" side, 
-        # values are a dictionaries of key, value pairs where key is a possible move coordinate as a string
-        # and value is either False for no skip involved, or a coordinate of a skipped piece
-        moves = defaultdict(dict)
-        skip_only_moves = defaultdict(dict)
-        diagonals = []
-        
-        # create a 2d array of coordinates as tuples from (0,0) to (ROWS-1, COLS-1)
-        positions = [[(j, i) for i in range(ROWS)] for j in range(COLS)]
-        
-        # create a flipped board of both positions and pieces to find a second diagonal of moves
-        flipped_positions = np.fliplr(positions)
-        flipped_board = np.fliplr(self.board)
-        
-        all_pieces = self.get_all_side_pieces(color)
-
-
-        for piece in all_pieces:
-            diagonals = []
-            # during flip, row stays the same, below finds the new column on a flipped board
-            flipped_piece_col = int(np.where(flipped_board == piece)[1])
-            row = piece.row
-            col = piece.col
-            moves[piece] = {}
-            # Create all possible directions of movement for a piece, if piece is a king it can move through the whole board
-            if piece.king:
-                # first diagonal with offset of col - row, transposed into a list of coordinate lists
-                diag1 = (np.diagonal(positions, col - row).T).tolist()
-
-                # second diagonal with offset accounted for the flip
-                diag2 = np.fliplr((flipped_positions.diagonal(flipped_piece_col - row).T)).tolist()
-
-                # find the index of position of current piece in the diagonal array
-                piece_idx_1 = diag1.index([row, col])
-                piece_idx_2 = diag2.index([row, col])
-
-                # split two diagonals into 4 lists representing 4 directions that go in order from the piece's position
-                # e.g. piece on 2,2 can move forward left to 1,1 or 0,0, back left 3,1 or 4,0
-                # forward right 1,3 -> 0, 4 or back right which on a 10x10 board would be (in order, which is important)
-                # 3,3 -> 4,4 -> 5,5 -> 6,6 -> 7,7 -> 8,8 -> 9,9
-                forward_left = list(reversed(diag1[:piece_idx_1]))
-                back_left = list(reversed(diag2[:piece_idx_2]))
-
-                # we ignore the current piece's position, so we use the try and except in case the piece is on the edge of the board
-                try:
-                    forward_right = diag2[piece_idx_2+1:]
-                except IndexError:
-                    forward_right = None
-
-                try:
-                    back_right = diag1[piece_idx_1+1:]
-                except IndexError:
-                    forward_right = None
-
-                # create an 3-deep array of directions, their coordinates, and row, col if direction was created - ergo not an edge piece
-                directions = [forward_left, back_left, forward_right, back_right]
-                for direction in directions:
-                    if direction != None:
-                        diagonals.append(direction)
-
-            # if not a king piece, only possible directions of movement are the corner spaces on the board. 
-            else:
-                diagonals = [
-                    [[row + piece.direction, col - piece.direction]],
-                    [[row + piece.direction, col + piece.direction]],
-                    [[row - piece.direction, col - piece.direction]],
-                    [[row - piece.direction, col + piece.direction]]
-                    ]
-
-            for diagonal in diagonals:
-                # for each diagonal we check if a skip occured separately 
-                skipped = False
-                for coordinates in diagonal:           
-                    # if by any chance coordinates were outside of the board     
-                    if not self.is_outside_board(coordinates):
-                        # row and column directions (-1/+1)
-                        row_dir, col_dir = self.get_direction(row, col, coordinates[0], coordinates[1])
-
-                        # if space on board is empty and a piece hasn't been skipped add a possible move to moves
-                        if self.board[coordinates[0]][coordinates[1]] == 0 and not skipped:
-                            if piece.king:
-                                moves[piece][str(coordinates)] = False
-                            elif piece.direction == row_dir:
-                                moves[piece][str(coordinates)] = False
-
-                        # if there are 2 consecutive pieces in a diagonal, break out of that diagonal
-                        elif self.board[coordinates[0]][coordinates[1]] != 0 and skipped:
-                            break
-
-                        # if space on board is empty but a piece has been skipped, then add current coordinate as viable move
-                        # and add previous coordinate as a skipped piece's coordinate
-                        elif self.board[coordinates[0]][coordinates[1]] == 0 and skipped:
-                            skipped_to_row, skipped_to_col = coordinates[0], coordinates[1]
-                            if not self.is_outside_board([skipped_to_row, skipped_to_col]):
-                                moves[piece][str([skipped_to_row, skipped_to_col])] = str([skipped_row, skipped_col]) 
-                                
-                        # if no piece have been skipped and the color of the piece at current coordinate is different then player's color
-                        # mark this move as a skip for next move in the diagonal if a piece is king. 
-                        # else just mark the move as viable with the skip information for non king piece.
-                        elif not skipped and self.board[coordinates[0]][coordinates[1]].color != piece.color:
-                                skipped_row, skipped_col = row_dir+row, col_dir+col 
-                                if piece.king:
-                                    skipped = True                              
-                                else:
-                                    skipped_to_row, skipped_to_col = row_dir*2+row, col_dir*2+col
-                                    # if the move after the skip is not outside of the board, then add it to the possible moves list
-                                    if not self.is_outside_board([skipped_to_row, skipped_to_col]) and self.board[skipped_to_row][skipped_to_col] == 0:
-                                        moves[piece][str([skipped_to_row, skipped_to_col])] = str([skipped_row, skipped_col])
-                        
-                        # if a piece on the diagonal is the same color as the current player, then break out of that diagonal               
-                        elif self.board[coordinates[0]][coordinates[1]].color == piece.color:
-                                break         
-                        else:
-                            break               
-        
-        # if any of the moves has a skip available, create a dictionary of only such moves, as skips are obligatory,
-        # therefor we are removing all other possible moves
-        for piece in moves:
-            skip_only_moves[piece] = {k: v for k, v in moves[piece].items() if v != False}
+        for square, (row, _) in enumerate(ROWCOL):
+            # if first half of the board then black else white, the two rows in the middle are empty
+            if row < ROWS//2 - 1:
+                self.squares[square] = BLACK_MAN
+            elif row > ROWS//2:
+                self.squares[square] = WHITE_MAN
+        self.recalculate()
+
+    # returns a copy of the position, without the history of the moves made on this board
+    def copy(self) -> 'Board':
+        board = Board.__new__(Board)
+        board.squares = self.squares[:]
+        board.king_moves = self.king_moves
+        board.history = []
+        board.hash = self.hash
+        board.white_left, board.black_left = self.white_left, self.black_left
+        board.white_kings, board.black_kings = self.white_kings, self.black_kings
+        board.white_dist, board.black_dist = self.white_dist, self.black_dist
+        return board
+
+    # recalculates the piece counters, the distances to becoming a king and the hash from the pieces on the board
+    def recalculate(self) -> None:
+        squares = self.squares
+        self.white_left = sum(1 for code in squares if code & WHITE_PIECE)
+        self.black_left = sum(1 for code in squares if code & BLACK_PIECE)
+        self.white_kings = squares.count(WHITE_KING)
+        self.black_kings = squares.count(BLACK_KING)
+        self.white_dist = sum(DIST_TO_KING[WHITE_PIECE][square] for square, code in enumerate(squares) if code & WHITE_PIECE)
+        self.black_dist = sum(DIST_TO_KING[BLACK_PIECE][square] for square, code in enumerate(squares) if code & BLACK_PIECE)
+        self.hash = self.compute_hash()
+
+    # calculates the zobrist hash of the pieces on the board from scratch
+    def compute_hash(self) -> int:
+        hash = 0
+        for square, code in enumerate(self.squares):
+            if code != EMPTY:
+                hash ^= KEYS[code][square]
+        return hash
+
+    # returns the zobrist hash of the position with the passed player(color) to move
+    def get_hash(self, color: tuple) -> int:
+        return self.hash ^ SIDE_KEYS[color]
+
+    # returns possible moves for all pieces of passed player(color), and information if the moves are skips.
+    # Skips are obligatory, so if any piece can skip only the skips are returned, each of them as a single move
+    # with the whole multi-jump sequence
+    def get_valid_moves(self, color: tuple) -> Tuple[List[Move], bool]:
+        moves = []
+        skips = []
+
+        side = SIDE[color]
+        for start, code in enumerate(self.squares):
+            if not code & side:
+                continue
+            for square, skipped in self.get_piece_moves(start).items():
+                if skipped is not None:
+                    self.follow_skips((start, square), (skipped,), skips)
+                elif not skips:
+                    moves.append(Move((start, square), (), self.is_promotion(code, square)))
+
+        # if any of the moves is a skip, return only the skips as skips are obligatory
+        if skips:
+            return skips, True
 
-        # only remaining movable pieces are the ones with possible moves    
-        skip_only_moves = {k: v for k, v in skip_only_moves.items() if v}    
-
-        # if skip_only_moves is not empty, then return it as tuple of possible moves, and information if a move has been skipped
-        if len(skip_only_moves) >= 1:
-            return skip_only_moves, True
-        
         # if no skips available, return the moves, and the information that there are no skips
         return moves, False
 
-    # calculates the direction of the diagonal by returning positive or negative 1 in place of a row and col
-    def get_direction(self, row: int, col: int, new_row: int, new_col: int) -> Tuple[int, int]:
-        #calulates the direction of movement on the board for non king piece
-        row_dir = new_row - row
-        col_dir = new_col - col
-        return row_dir, col_dir
-
-    # checks if a move is made within board boundaries
-    def is_outside_board(self, coordinates: tuple) -> bool:        
-        row, col = coordinates
-        if row < 0 or col < 0 or row >= ROWS or col >= COLS:
-            return True
-        return False
+    # follows a skip to the end of a multi-jump by making each skip on the board and taking it back afterwards,
+    # every finished sequence is added to the skips list
+    def follow_skips(self, path: tuple, captured: tuple, skips: list) -> None:
+        skip = Move(path[-2:], captured[-1:])
+        self.make_move(skip)
+
+        # if after skipping there is another skip available, the same piece has to keep skipping
+        square = path[-1]
+        next_skips = [(target, skipped) for target, skipped in self.get_piece_moves(square).items() if skipped is not None]
+        for target, skipped in next_skips:
+            self.follow_skips(path + (target,), captured + (skipped,), skips)
+        if not next_skips:
+            # make a piece into a king if the piece ends its move on the edge of the board
+            skips.append(Move(path, captured, self.is_promotion(self.squares[square], square)))
+
+        self.unmake_move(skip)
+
+    # checks if the piece with the code becomes a king when it ends its move on the passed square
+    @staticmethod
+    def is_promotion(code: int, square: int) -> bool:
+        if code & KING:
+            return False
+        return ROWCOL[square][0] == PROMOTION_ROW[code & SIDES]
+
+    # returns possible moves of the piece on the square in one step, as a dictionary which keys are squares the piece can move to
+    # and values are either None for no skip involved, or the square of a skipped piece
+    def get_piece_moves(self, start: int) -> dict:
+        squares = self.squares
+        code = squares[start]
+        side = code & SIDES
+        moves = {}
+        # walk the precomputed diagonals going out of the piece's square, in order from the nearest square
+        for (row_dir, _), ray in zip(DIRECTIONS, RAYS[start]):
+            if not ray:
+                continue
+
+            # a king can move through the whole diagonal and skip a piece at any distance,
+            # then land on any empty square behind it
+            if code & KING:
+                skipped = None
+                for square in ray:
+                    target = squares[square]
+                    if target == EMPTY:
+                        moves[square] = skipped
+                    # if no piece have been skipped and the color of the piece is different then player's color, mark it as skipped
+                    elif skipped is None and not target & side:
+                        skipped = square
+                    # if there are 2 consecutive pieces or a piece of the same color, break out of that diagonal
+                    else:
+                        break
 
-    # remove the piece from the board and update board attributes
-    def remove_piece(self, piece: object):        
-        self.board[piece.row][piece.col] = 0
-        if piece.color == WHITE:
+            # if not a king piece, it moves only forward to the corner space, but it can skip in every direction
+            else:
+                target = squares[ray[0]]
+                if target == EMPTY:
+                    if row_dir == DIRECTION[side]:
+                        moves[ray[0]] = None
+                elif not target & side and len(ray) > 1:
+                    if squares[ray[1]] == EMPTY:
+                        moves[ray[1]] = ray[0]
+
+        return moves
+
+    # remove the piece on the square from the board and update board attributes
+    def remove_piece(self, square: int):
+        code = self.squares[square]
+        self.squares[square] = EMPTY
+        self.hash ^= KEYS[code][square]
+        if code & WHITE_PIECE:
             self.white_left -= 1
-            if piece.king:
+            self.white_dist -= DIST_TO_KING[WHITE_PIECE][square]
+            if code & KING:
                 self.white_kings -= 1
         else:
             self.black_left -= 1
-            if piece.king:
+            self.black_dist -= DIST_TO_KING[BLACK_PIECE][square]
+            if code & KING:
                 self.black_kings -= 1
+
+    # put a removed piece with the code back on the square and update board attributes
+    def restore_piece(self, square: int, code: int):
+        self.squares[square] = code
+        self.hash ^= KEYS[code][square]
+        if code & WHITE_PIECE:
+            self.white_left += 1
+            self.white_dist += DIST_TO_KING[WHITE_PIECE][square]
+            if code & KING:
+                self.white_kings += 1
+        else:
+            self.black_left += 1
+            self.black_dist += DIST_TO_KING[BLACK_PIECE][square]
+            if code & KING:
+                self.black_kings += 1
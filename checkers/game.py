@@ -1,8 +1,7 @@
-from numpy import array
-import pygame
-from ast import literal_eval
 from checkers.board import Board
-from checkers.constants import WHITE, BLACK, BLUE, SQUARE_SIZE, ROWS
+from checkers.constants import WHITE, BLACK
+from checkers.move import Move
+from checkers.squares import SQUARE
 from time import sleep
 from typing import Tuple
 
@@ -11,19 +10,30 @@ class Game:
         #function for init to easly reset the game state to initial
         self._init()
         self.window = window
+        # the renderer is created on the first frame, so that the game's rules can be used without loading pygame
+        self.renderer = None
 
-    # game update redraws the next frame of the game
+    # game update draws the next frame of the game, only the squares that changed since the last one are redrawn
     def update(self) -> None:
-        self.board.draw(self.window)
-        self.draw_valid_moves(self.valid_moves, self.selected)
-        pygame.display.update()
+        if self.renderer is None:
+            from checkers.renderer import Renderer
+            self.renderer = Renderer(self.window)
+        self.renderer.render(self.board, self.get_highlighted())
+
+    # makes the next frame draw the whole window, e.g. after the window was covered
+    def invalidate(self) -> None:
+        if self.renderer is not None:
+            self.renderer.invalidate()
 
     # additional init function for reseting the game
     def _init(self):
         self.selected = None
         self.board = Board()
         self.turn = WHITE
-        self.valid_moves = {}
+        self.valid_moves = []
+        # squares the selected piece went through so far, and the skips already made on the board during a multi-jump
+        self.path = ()
+        self.steps = []
         self.winner = None
 
     # reset function
@@ -32,78 +42,58 @@ class Game:
 
     # this function handles selection of a space on the board
     def select(self, row: int, col: int) -> bool:
-        #if a piece has been skipped, mark it, else select a piece
-        if self.board.skipped:
-            piece = self.board.skipped
-        else:
-            piece = self.board.get_piece(row, col)
-        #if piece selected, try to move it, else just reselect the current selection
-        if self.selected:
-            result = self._move(row, col)
-            if not result:
-                self.selected = None
-                self.select(row, col)
+        #if piece selected, try to move it
+        if self.selected and self._move(SQUARE[row][col]):
+            return True
+        # in the middle of a multi-jump only the skipping piece can move
+        if self.steps:
+            return False
+
         #if selected is an instance of a Piece class and it's current player's piece, check all valid moves for that player
+        piece = self.board.get_piece(row, col)
         if piece != 0 and piece.color == self.turn:
             self.selected = piece
+            self.path = (SQUARE[row][col],)
             self.valid_moves, _ = self.board.get_valid_moves(self.turn)
             return True
 
+        self.selected = None
+        self.path = ()
         return False
 
-    # function that tries to move the piece on the board
-    def _move(self, row: int, col: int) -> bool:
-        #get selected spot on the board
-        piece = self.board.get_piece(row, col)
-        # retrieve the possible moves for current piece
-        possible_moves = self.valid_moves.get(self.selected)
-        #if selected is an empty space, and is a valid move, then make that move
-        if possible_moves:
-            if self.selected and piece == 0 and str([row, col]) in possible_moves.keys():
-                self.board.move(self.selected, row, col)
-
-                # if skipped, remove skipped piece
-                if possible_moves[str([row, col])]:
-                    skipped_piece = literal_eval(self.valid_moves[self.selected][str([row, col])])
-                    remove_piece = self.board.get_piece(
-                        skipped_piece[0], skipped_piece[1])
-                    self.board.remove_piece(remove_piece)
-
-                    # if after skipping there is another skip available, keep current players turn and allow him to move only the selected piece.
-                    piece = self.board.get_piece(row, col)
-                    self.valid_moves, skipped = self.board.get_valid_moves(self.turn)
-                    if skipped and piece in self.valid_moves.keys():
-                        self.board.skipped = piece
-                        self.select(row, col)
-                    else:
-                        # if a piece gets to opposite end, make it a king and change turn
-                        if row == 0 or row == ROWS-1:
-                            self.board.make_king(self.selected, row)
-                            self.change_turn()
-                            return True
-
-                # if a piece gets to opposite end, make it a king and change turn
-                else:
-                    if row == 0 or row == ROWS-1:
-                        self.board.make_king(self.selected, row)
-                        self.change_turn()
-                        return True
-
-                # change turn if no skip avilable
-                if not self.board.skipped:
-                    self.change_turn()
-
-                self.board.skipped = None
+    # returns valid moves of the selected piece that continue the path it has made so far
+    def get_selected_moves(self) -> list:
+        length = len(self.path)
+        return [move for move in self.valid_moves if len(move.path) > length and move.path[:length] == self.path]
+
+    # function that tries to move the selected piece to a square on the board
+    def _move(self, square: int) -> bool:
+        # retrieve the possible moves for current piece going through the selected square
+        possible_moves = [move for move in self.get_selected_moves() if move.path[len(self.path)] == square]
+        if not possible_moves:
+            return False
+
+        self.path += (square,)
+        move = possible_moves[0]
+        # if the move is finished, take back the skips made so far and make the whole move,
+        # which also makes a piece a king if it gets to the opposite end
+        if len(move.path) == len(self.path):
+            for step in reversed(self.steps):
+                self.board.unmake_move(step)
+            self.steps = []
+            self.board.make_move(move)
+            self.change_turn()
+        # if after skipping there is another skip available, keep current players turn and allow him to move only the selected piece.
+        else:
+            step = Move(self.path[-2:], move.captured[len(self.path) - 2:len(self.path) - 1])
+            self.board.make_move(step)
+            self.steps.append(step)
         return True
 
-    # Draws valid moves as blue dots on the board
-    def draw_valid_moves(self, moves: dict, current_piece: object) -> None:
-        if current_piece in moves:
-            for key, value in moves[current_piece].items():
-                key_list = literal_eval(key)
-                row, col = key_list[0], key_list[1]
-                pygame.draw.circle(self.window, BLUE, (col * SQUARE_SIZE +
-                                SQUARE_SIZE//2, row * SQUARE_SIZE + SQUARE_SIZE//2), 15)
+    # returns the squares the selected piece can move to next, they are drawn as blue dots on the board
+    def get_highlighted(self) -> set:
+        length = len(self.path)
+        return {move.path[length] for move in self.get_selected_moves()}
 
     # switches players turns
     def change_turn(self):
@@ -131,8 +121,9 @@ class Game:
             elif input() == 'n':
                 exit()
         else:
-            self.valid_moves = {}
-            self.board.skipped = False
+            self.valid_moves = []
+            self.path = ()
+            self.steps = []
             self.selected = None
             if self.turn == WHITE:
                 self.turn = BLACK
@@ -145,7 +136,7 @@ class Game:
     def get_board(self) -> object:
         return self.board
 
-    # if ai is playing, then this switches the current board with the board where the AI made a move
-    def ai_move(self, board):
-        self.board = board
+    # if ai is playing, then this makes the move the AI has chosen on the board
+    def ai_move(self, move):
+        self.board.make_move(move)
         self.change_turn()
\ No newline at end of file
@@ -0,0 +1,33 @@
+from typing import Tuple
+from .squares import ROWCOL
+
+
+# a single move of a piece. A multi-jump is a single move with every landing square in the path
+# and every skipped piece's square in captured. Squares are numbered as in squares.py
+class Move:
+    __slots__ = ('path', 'captured', 'promotion')
+
+    def __init__(self, path: Tuple[int, ...], captured: Tuple[int, ...] = (), promotion: bool = False) -> None:
+        self.path = path
+        self.captured = captured
+        self.promotion = promotion
+
+    # square the piece starts the move on
+    @property
+    def start(self) -> int:
+        return self.path[0]
+
+    # square the piece ends the move on
+    @property
+    def end(self) -> int:
+        return self.path[-1]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Move) and self.path == other.path and self.captured == other.captured
+
+    def __hash__(self) -> int:
+        return hash((self.path, self.captured))
+
+    def __repr__(self) -> str:
+        separator = 'x' if self.captured else '-'
+        return separator.join(str(list(ROWCOL[square])) for square in self.path)
@@ -0,0 +1,191 @@
+import mmap
+import struct
+from typing import Iterator, List, Tuple
+from .bitboard import BitBoard, bits
+from .constants import BLACK, WHITE
+from .move import Move
+
+# Positions and moves use the draughts notation, playable squares are numbered from 1 in reading order,
+# white starts on 31-50 and black on 1-20, like squares.py numbers them from 0.
+# FEN of a position: side to move, then the squares of each side's pieces with K before the kings,
+# e.g. the start position is W:W31,...,50:B1,...,20
+
+# binary position: the four masks of a BitBoard, then a byte with the side to move in the lowest bit
+# and the king_moves counter in the rest
+POSITION = struct.Struct('<4QB')
+
+# record of a game log: a binary position, the result of the game it comes from
+# (1 white won, 0 draw, -1 black won), the number of the move and the game's number
+RECORD = struct.Struct('<4QBbHI')
+_GAME = struct.Struct('<bHI')
+
+# results of a game as they are kept in the game log
+WHITE_WON, DRAW, BLACK_WON = 1, 0, -1
+
+# result strings of PDN, from the white side
+PDN_RESULTS = {WHITE_WON: '2-0', DRAW: '1-1', BLACK_WON: '0-2', None: '*'}
+
+
+# returns the board as a BitBoard, without a copy if it's already one
+def to_bitboard(board: object) -> BitBoard:
+    return board if isinstance(board, BitBoard) else BitBoard.from_board(board)
+
+
+# returns the FEN of the board with the passed side to move
+def to_fen(board: object, color: tuple) -> str:
+    bitboard = to_bitboard(board)
+    sides = []
+    for letter, men, kings in (('W', bitboard.white_men, bitboard.white_kings), ('B', bitboard.black_men, bitboard.black_kings)):
+        # squares in increasing order, kings marked with K
+        squares = sorted([(square, '') for square in bits(men)] + [(square, 'K') for square in bits(kings)])
+        sides.append(letter + ','.join(f'{king}{square + 1}' for square, king in squares))
+    return ':'.join(['W' if color == WHITE else 'B'] + sides)
+
+
+# parses a FEN into a BitBoard and the side to move, ranges of men like 31-35 are accepted too
+def from_fen(fen: str) -> Tuple[BitBoard, tuple]:
+    fields = fen.strip().rstrip('.').split(':')
+    if not fields or fields[0].upper() not in ('W', 'B'):
+        raise ValueError(f'invalid side to move in FEN: {fen}')
+    bitboard = BitBoard()
+    for field in fields[1:]:
+        if not field:
+            continue
+        letter, squares = field[0].upper(), field[1:]
+        if letter not in ('W', 'B'):
+            raise ValueError(f'invalid side in FEN: {field}')
+        for token in filter(None, squares.split(',')):
+            king = token[0].upper() == 'K'
+            if king:
+                token = token[1:]
+            first, _, last = token.partition('-')
+            for number in range(int(first), int(last or first) + 1):
+                if not 1 <= number <= 50:
+                    raise ValueError(f'invalid square in FEN: {number}')
+                bit = 1 << (number - 1)
+                if letter == 'W' and king:
+                    bitboard.white_kings |= bit
+                elif letter == 'W':
+                    bitboard.white_men |= bit
+                elif king:
+                    bitboard.black_kings |= bit
+                else:
+                    bitboard.black_men |= bit
+    return bitboard, WHITE if fields[0].upper() == 'W' else BLACK
+
+
+# creates a Board and the side to move from a FEN
+def board_from_fen(fen: str) -> Tuple[object, tuple]:
+    bitboard, color = from_fen(fen)
+    return bitboard.to_board(), color
+
+
+# returns the move in PDN, every landing square of a multi-jump is written, e.g. 32-28 or 28x19x10
+def move_to_pdn(move: Move) -> str:
+    return ('x' if move.captured else '-').join(str(square + 1) for square in move.path)
+
+
+# finds the valid move of the board the PDN move stands for. A skip can be written with only its start and end,
+# or with every landing square, it's ambiguous only if different pieces can be captured on the same way
+def move_from_pdn(text: str, board: object, color: tuple) -> Move:
+    squares = tuple(int(square) - 1 for square in text.strip().replace('x', '-').split('-'))
+    moves = board.get_valid_moves(color)[0]
+    matching = [move for move in moves if move.path == squares]
+    if not matching:
+        matching = [move for move in moves if (move.start, move.end) == (squares[0], squares[-1])
+                    and all(square in move.path for square in squares)]
+    if len({move.captured for move in matching}) != 1:
+        raise ValueError(f'{"ambiguous" if matching else "invalid"} move: {text}')
+    return matching[0]
+
+
+# returns the game from the start position in PDN, e.g. 1. 32-28 19-23 2. 28x19 14x23 2-0
+def game_to_pdn(moves: List[Move], result: int = None) -> str:
+    tokens = []
+    for index, move in enumerate(moves):
+        if index % 2 == 0:
+            tokens.append(f'{index // 2 + 1}.')
+        tokens.append(move_to_pdn(move))
+    tokens.append(PDN_RESULTS[result])
+    return f'[GameType "20"]\n[Result "{PDN_RESULTS[result]}"]\n\n' + ' '.join(tokens) + '\n'
+
+
+# parses the moves of a PDN game played from the start position, tags, comments and move numbers are skipped
+def game_from_pdn(text: str) -> List[Move]:
+    board = BitBoard.create_board()
+    color = WHITE
+    moves = []
+    body = ' '.join(line for line in text.splitlines() if not line.lstrip().startswith('['))
+    while '{' in body:
+        start = body.index('{')
+        body = body[:start] + body[body.index('}', start) + 1:]
+    for token in body.split():
+        if token.endswith('.') or token in PDN_RESULTS.values():
+            continue
+        move = move_from_pdn(token, board, color)
+        board.make_move(move)
+        moves.append(move)
+        color = BLACK if color == WHITE else WHITE
+    return moves
+
+
+# the byte with the side to move and the king_moves counter of a binary position
+def _flags(bitboard: BitBoard, color: tuple) -> int:
+    return (color == BLACK) | min(bitboard.king_moves, 127) << 1
+
+
+# encodes the board with the passed side to move into POSITION.size bytes
+def encode(board: object, color: tuple) -> bytes:
+    bitboard = to_bitboard(board)
+    return POSITION.pack(bitboard.white_men, bitboard.white_kings, bitboard.black_men, bitboard.black_kings,
+                         _flags(bitboard, color))
+
+
+# decodes a binary position into a BitBoard and the side to move
+def decode(data: bytes) -> Tuple[BitBoard, tuple]:
+    white_men, white_kings, black_men, black_kings, flags = POSITION.unpack(data)
+    return BitBoard(white_men, white_kings, black_men, black_kings, flags >> 1), BLACK if flags & 1 else WHITE
+
+
+# returns game log records of the positions of a game, encoded with encode as they were played, and the result it ended with
+def game_records(positions: List[bytes], result: int, game: int) -> bytes:
+    return b''.join(position + _GAME.pack(result, ply, game) for ply, position in enumerate(positions))
+
+
+# Append-only log of played games, made of fixed size RECORD records one after another.
+# Every game is appended at once with a single write, so the log can be read while games are still being appended
+class GameLog:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = open(path, 'ab')
+
+    # appends the records of a game, as returned by game_records
+    def append(self, records: bytes) -> None:
+        self.file.write(records)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'GameLog':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Yields the records of a game log as (white_men, white_kings, black_men, black_kings, flags, result, ply, game) tuples.
+# The file is memory mapped and unpacked record by record, so no board or piece objects are created.
+# A record still being written at the end of the log is left out
+def read_log(path: str) -> Iterator[tuple]:
+    with open(path, 'rb') as file:
+        file.seek(0, 2)
+        size = file.tell() // RECORD.size * RECORD.size
+        if not size:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                yield from RECORD.iter_unpack(view[:size])
+            finally:
+                view.release()
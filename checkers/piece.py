@@ -1,54 +1,38 @@
-import pygame
-from .constants import WHITE, BLACK, SQUARE_SIZE, RED, GOLD, ROWS
+from .constants import WHITE, BLACK
 
-#Piece class taken from the Tech with Tim checkers video, modified for my needs
+# Pieces are kept on the board as small integer codes: a bit for the side of the piece and a bit for a king,
+# 0 is an empty square
+EMPTY = 0
+WHITE_PIECE = 1
+BLACK_PIECE = 2
+KING = 4
+SIDES = WHITE_PIECE | BLACK_PIECE
+WHITE_MAN, WHITE_KING = WHITE_PIECE, WHITE_PIECE | KING
+BLACK_MAN, BLACK_KING = BLACK_PIECE, BLACK_PIECE | KING
+
+# side bit of every color and color of every side bit
+SIDE = {WHITE: WHITE_PIECE, BLACK: BLACK_PIECE}
+COLOR = {WHITE_PIECE: WHITE, BLACK_PIECE: BLACK}
+
+#Piece class taken from the Tech with Tim checkers video, modified for my needs.
+# The board doesn't keep Piece objects, they are created from the piece codes for the game
 
 class Piece:
     PADDING = 10
     BORDER = 2
 
-    def __init__(self, row, col, color):
+    __slots__ = ('row', 'col', 'color', 'king')
+
+    def __init__(self, row, col, color, king=False):
         self.row = row
         self.col = col
         self.color = color
-        self.king = False
-        
-        if self.color == WHITE:
-            self.direction = -1
-            self.dist_to_king = self.row
-        else:
-            self.direction = 1
-            self.dist_to_king = ROWS - self.row - 1
-
-        self.x = 0
-        self.y = 0
-        self.calculate_position()
-
-    def calculate_position(self):
-        self.x = SQUARE_SIZE * self.col + SQUARE_SIZE //2
-        self.y = SQUARE_SIZE * self.row + SQUARE_SIZE //2
-        if self.color == WHITE:
-            self.dist_to_king = self.row
-        else:
-            self.dist_to_king = ROWS - self.row - 1
-
-    def make_king(self):
-        self.king = True
-
-    def draw(self, window):
-        radius = SQUARE_SIZE//2 - self.PADDING
-        pygame.draw.circle(window, RED, (self.x, self.y), radius + self.BORDER)
-        if self.king:
-            pygame.draw.circle(window, GOLD, (self.x, self.y), radius + self.BORDER)
-            pygame.draw.circle(window, self.color, (self.x, self.y), radius - self.BORDER)
-        else:
-            pygame.draw.circle(window, self.color, (self.x, self.y), radius)
-
-    def move(self, new_row, new_col):
-        self.row = new_row
-        self.col = new_col
-        self.calculate_position()
+        self.king = king
+
+    # creates the piece with the passed code standing on the row and column
+    @classmethod
+    def from_code(cls, row, col, code):
+        return cls(row, col, COLOR[code & SIDES], bool(code & KING))
 
     def __repr__(self):
         return str(self.color)
-
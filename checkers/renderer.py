@@ -0,0 +1,80 @@
+import pygame
+from .constants import BLUE, COLS, DARK_BROWN, GOLD, LIGHT_BROWN, RED, ROWS, SQUARE_SIZE
+from .piece import BLACK_KING, BLACK_MAN, COLOR, KING, SIDES, WHITE_KING, WHITE_MAN, Piece
+from .squares import ROWCOL
+
+# radius of the dots marking the squares the selected piece can move to
+DOT_RADIUS = 15
+
+
+# Draws the board into the window, only redrawing the squares that changed since the last frame.
+# The checkerboard is drawn once into a background surface and every kind of piece into a sprite,
+# so a changed square is just two blits, and only the changed squares are updated on the screen
+class Renderer:
+    def __init__(self, window) -> None:
+        self.window = window
+        self.background = self.create_background()
+        self.sprites = {code: self.create_sprite(COLOR[code & SIDES], bool(code & KING)) for code in (WHITE_MAN, WHITE_KING, BLACK_MAN, BLACK_KING)}
+        # what was drawn on every playable square in the last frame, None if the whole window has to be drawn
+        self.drawn = None
+
+    # draws the colorful checkerboard the pieces stand on
+    @staticmethod
+    def create_background() -> pygame.Surface:
+        background = pygame.Surface((COLS * SQUARE_SIZE, ROWS * SQUARE_SIZE))
+        for row in range(ROWS):
+            for col in range(COLS):
+                color = DARK_BROWN if (row + col) % 2 else LIGHT_BROWN
+                pygame.draw.rect(background, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+        return background
+
+    # draws a piece in the middle of a transparent square, the board only keeps piece codes
+    # so this is the only place the pixel position and size of a piece are calculated
+    @staticmethod
+    def create_sprite(color: tuple, king: bool) -> pygame.Surface:
+        sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+        center = (SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+        radius = SQUARE_SIZE // 2 - Piece.PADDING
+        pygame.draw.circle(sprite, RED, center, radius + Piece.BORDER)
+        if king:
+            pygame.draw.circle(sprite, GOLD, center, radius + Piece.BORDER)
+            pygame.draw.circle(sprite, color, center, radius - Piece.BORDER)
+        else:
+            pygame.draw.circle(sprite, color, center, radius)
+        return sprite
+
+    # makes the next frame draw the whole window, e.g. after the window was covered
+    def invalidate(self) -> None:
+        self.drawn = None
+
+    # Draws the pieces of the board and the dots on the highlighted squares. Only squares that changed since the last
+    # frame are drawn and updated on the screen, if nothing changed nothing is done. Returns True if anything was drawn
+    def render(self, board: object, highlighted: set = frozenset()) -> bool:
+        squares = [(code, square in highlighted) for square, code in enumerate(board.squares)]
+
+        if self.drawn is None:
+            self.window.blit(self.background, (0, 0))
+            changed = range(len(squares))
+        else:
+            changed = [square for square, drawn in enumerate(self.drawn) if drawn != squares[square]]
+        if not changed:
+            return False
+
+        rects = []
+        for square in changed:
+            row, col = ROWCOL[square]
+            rect = pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+            self.window.blit(self.background, rect, rect)
+            code, dot = squares[square]
+            if code:
+                self.window.blit(self.sprites[code], rect)
+            if dot:
+                pygame.draw.circle(self.window, BLUE, rect.center, DOT_RADIUS)
+            rects.append(rect)
+
+        if self.drawn is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+        self.drawn = squares
+        return True
@@ -0,0 +1,31 @@
+from .constants import ROWS, COLS
+
+# only the dark squares are playable, they are numbered from 0 in reading order (top left to bottom right)
+# which is the same order as the draughts notation that counts them from 1
+SQUARES = ROWS * COLS // 2
+
+# row and column of every playable square
+ROWCOL = tuple((row, col) for row in range(ROWS) for col in range(COLS) if col % 2 == (row + 1) % 2)
+
+# square number of every row and column, None for the light squares
+SQUARE = [[None] * COLS for _ in range(ROWS)]
+for square, (row, col) in enumerate(ROWCOL):
+    SQUARE[row][col] = square
+
+# the four diagonal directions as (row, col) steps
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+# squares on each of the four diagonals going out of every square, in the order of DIRECTIONS.
+# Each diagonal is ordered from the nearest square to the edge of the board, so that move generation only has to walk them
+def _ray(square: int, row_dir: int, col_dir: int) -> tuple:
+    row, col = ROWCOL[square]
+    ray = []
+    row, col = row + row_dir, col + col_dir
+    while 0 <= row < ROWS and 0 <= col < COLS:
+        ray.append(SQUARE[row][col])
+        row, col = row + row_dir, col + col_dir
+    return tuple(ray)
+
+
+RAYS = tuple(tuple(_ray(square, row_dir, col_dir) for row_dir, col_dir in DIRECTIONS) for square in range(SQUARES))
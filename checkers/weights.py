@@ -0,0 +1,26 @@
+import json
+from collections import namedtuple
+
+# Weights of the evaluation terms of Board.evaluate: points per piece (a man, and a king on top of it),
+# and per unit of the distance term of each side. The defaults are the weights the evaluation always had,
+# 3 points per man and 5 per king times 5 for the material, and 2 twice for the distance
+Weights = namedtuple('Weights', ['man', 'king', 'distance'], defaults=[15.0, 25.0, 4.0])
+
+WEIGHTS = Weights()
+
+
+# reads weights from a JSON file with a number for each of the weights, missing ones keep their default
+def load_weights(path: str) -> Weights:
+    with open(path) as file:
+        values = json.load(file)
+    unknown = set(values) - set(Weights._fields)
+    if unknown:
+        raise ValueError(f'{path} has unknown weights: {", ".join(sorted(unknown))}')
+    return Weights(**{name: float(value) for name, value in values.items()})
+
+
+# writes the weights into a JSON file that load_weights reads
+def save_weights(weights: Weights, path: str) -> None:
+    with open(path, 'w') as file:
+        json.dump(weights._asdict(), file, indent=2)
+        file.write('\n')
@@ -0,0 +1,14 @@
+from random import Random
+from .constants import BLACK, WHITE
+from .squares import SQUARES
+
+# Zobrist keys for hashing board positions. The keys are generated from a fixed seed,
+# so that a position has the same hash every time the game is started
+_random = Random(20220403)
+
+# a random 64 bit key for every (color, king) piece on every square
+PIECE_KEYS = {(color, king): tuple(_random.getrandbits(64) for _ in range(SQUARES))
+              for color in (WHITE, BLACK) for king in (False, True)}
+
+# key of the side to move, xored into the hash of positions with black to move
+SIDE_KEYS = {WHITE: 0, BLACK: _random.getrandbits(64)}
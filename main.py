@@ -1,11 +1,39 @@
 import pygame
 import argparse
+import logging
 from checkers.constants import SQUARE_SIZE, WIDTH, HEIGHT, WHITE, BLACK, PLAYER, WHITE_LEVEL, BLACK_LEVEL
 from checkers.game import Game
-from minimax.algorithm import minimax
+from checkers.weights import WEIGHTS, Weights, load_weights
+from minimax.algorithm import SearchContext, SearchResult, search_root
+from minimax.background import BackgroundSearch
+from minimax.book import OpeningBook
+from minimax.ordering import MoveOrdering
+from minimax.parallel import create_pool, parallel_search
+from minimax.ponder import ponder
+from minimax.search import iterative_deepening
+from minimax.selection import MARGIN, MoveSelector
+from minimax.stats import SearchStats
+from minimax.tablebase import Tablebase
+from minimax.transposition import TranspositionTable
 
 FPS = 60
-WINDOW = pygame.display.set_mode((WIDTH, HEIGHT))
+# time budget per AI move in seconds, if None the AI searches to the fixed depth of its level
+MOVETIME = None
+# number of processes searching the AI moves
+THREADS = 1
+# seed of the AI's random choice between equally good moves, and whether it always plays the best move
+SEED = None
+DETERMINISTIC = False
+# endgame tablebase file the AI probes, generated with python -m minimax.tablebase
+TABLEBASE = None
+# opening book file the AI plays from before searching, built with python -m minimax.book
+BOOK = None
+# whether the AI searches its replies to the human's likely moves while the human thinks
+PONDER = False
+# file with the weights of the AI's evaluation, tuned with python -m minimax.tuning, None for the default weights
+WEIGHTS_FILE = None
+# whether the statistics of every AI search are logged
+STATS = False
 
 #translates mouse position on the board into row and column of the board
 def get_position_mouse(pos: tuple) -> tuple:
@@ -14,37 +42,154 @@ def get_position_mouse(pos: tuple) -> tuple:
     col = x // SQUARE_SIZE
     return row, col
 
+# parses a time budget like 500ms, 2s or 1.5 (seconds) into seconds
+def parse_movetime(value: str) -> float:
+    if value.endswith('ms'):
+        return float(value[:-2]) / 1000
+    if value.endswith('s'):
+        return float(value[:-1])
+    return float(value)
+
+# searches the best move for the AI, with a time budget if it was set, otherwise to the depth of the AI level.
+# The context has the transposition table and the tablebase of the search and can be used to cancel it.
+# If a pool of processes is passed, root moves are searched in parallel. The selector picks the move to make.
+# Positions in the opening book aren't searched at all, the book move is picked with the selector's random generator
+def get_ai_move(board: object, level: int, max_player: bool, context: SearchContext, selector: MoveSelector, pool: object = None,
+                book: OpeningBook = None) -> object:
+    if book is not None:
+        move = book.choose(board, WHITE if max_player else BLACK, selector.random if selector.margin else None)
+        if move is not None:
+            return move
+
+    if MOVETIME:
+        return iterative_deepening(board, max_player, MOVETIME, executor=pool, selector=selector, context=context).move
+
+    if pool is not None:
+        _, move = parallel_search(board, level, max_player, pool, context, selector=selector)
+        return move
+
+    context.table.new_search()
+    _, move = search_root(board, level, max_player, context, selector)
+    return move
+
+# prints how deep the search of a move that is played got, when the AI searches with a time budget
+def report_search(result: SearchResult) -> None:
+    if MOVETIME and result is not None:
+        print(f'Depth reached: {result.depth}, nodes: {result.nodes}, time: {result.time:.2f}s')
+
+# starts searching the AI move in a background thread, on a copy of the board so the game's board can be drawn meanwhile
+def start_ai_search(board: object, level: int, max_player: bool, table: TranspositionTable, selector: MoveSelector, pool: object,
+                    tablebase: Tablebase, book: OpeningBook, weights: Weights) -> BackgroundSearch:
+    copy = board.copy()
+    context = SearchContext(table, ordering=MoveOrdering(), tablebase=tablebase, weights=weights,
+                            stats=SearchStats() if STATS else None)
+    return BackgroundSearch(lambda search_context: get_ai_move(copy, level, max_player, search_context, selector, pool, book), context)
+
+# Starts searching the AI replies to the human's moves in a background thread, the replies are put into results
+# and the results of their searches with the state of the random generator after them into reports, both by the hash
+# of the position they are for. Every reply is picked with a copy of the AI's selector as it is now, so the AI's
+# generator isn't drawn from by speculative searches. When a pondered reply is played the AI's generator takes
+# its state after the reply, so a seeded game plays the same moves whether the replies were pondered on or not
+def start_pondering(board: object, level: int, color: tuple, table: TranspositionTable, selector: MoveSelector, pool: object,
+                    tablebase: Tablebase, book: OpeningBook, weights: Weights, results: dict, reports: dict) -> BackgroundSearch:
+    copy = board.copy()
+    context = SearchContext(table, ordering=MoveOrdering(), tablebase=tablebase, weights=weights)
+    max_player = color == BLACK
+    state = selector.random.getstate()
+    def search(reply_board: object, reply_context: SearchContext) -> object:
+        reply_selector = MoveSelector(margin=selector.margin)
+        reply_selector.random.setstate(state)
+        move = get_ai_move(reply_board, level, max_player, reply_context, reply_selector, pool, book)
+        reports[reply_board.get_hash(WHITE if max_player else BLACK)] = reply_context.best, reply_selector.random.getstate()
+        return move
+    return BackgroundSearch(lambda search_context: ponder(copy, color, search, search_context, results), context)
+
 def main() -> None:
     run = True
     clock = pygame.time.Clock()
-    game = Game(WINDOW)
+    # the window is created here and not at import, so that the worker processes don't open their own windows
+    window = pygame.display.set_mode((WIDTH, HEIGHT))
+    game = Game(window)
+    # transposition table is kept between the moves, as positions searched for the previous move come up again
+    table = TranspositionTable()
+    weights = load_weights(WEIGHTS_FILE) if WEIGHTS_FILE else WEIGHTS
+    pool = create_pool(THREADS, TABLEBASE, weights) if THREADS > 1 else None
+    tablebase = Tablebase(TABLEBASE) if TABLEBASE else None
+    book = OpeningBook(BOOK) if BOOK else None
+    selector = MoveSelector(SEED, 0 if DETERMINISTIC else MARGIN)
+    # the AI move being searched in the background, None when it isn't the AI's turn
+    search = None
+    # the search of the AI replies while the human thinks, and the replies it found and the results of their searches
+    # with the states of the selector after them, by the hash of their positions
+    pondering = None
+    replies = {}
+    reports = {}
 
     while run: 
         clock.tick(FPS)
         
 
-        if not game.board.is_won(game.turn) or not game.board.is_tie():
-            if game.turn == BLACK and BLACK_LEVEL:
-                _, new_board = minimax(game.board, BLACK_LEVEL, False, float('-inf'), float('inf'))
-                game.ai_move(new_board)
-                
+        if search is None and (not game.board.is_won(game.turn) or not game.board.is_tie()):
+            level = BLACK_LEVEL if game.turn == BLACK else WHITE_LEVEL
+            other_level = WHITE_LEVEL if game.turn == BLACK else BLACK_LEVEL
+            if level:
+                # stop pondering once the human has moved, the reply to the move may have been found already
+                if pondering is not None:
+                    pondering.cancel()
+                    pondering = None
+                key = game.board.get_hash(game.turn)
+                move = replies.get(key)
+                report, state = reports.get(key, (None, None))
+                replies, reports = {}, {}
+                if move is not None:
+                    report_search(report)
+                    selector.random.setstate(state)
+                    game.ai_move(move)
+                else:
+                    search = start_ai_search(game.board, level, game.turn == WHITE, table, selector, pool, tablebase, book, weights)
+
+            elif PONDER and other_level and pondering is None and not game.steps:
+                pondering = start_pondering(game.board, other_level, game.turn, table, selector, pool, tablebase, book, weights, replies, reports)
 
-            elif game.turn == WHITE and WHITE_LEVEL:          
-               _, new_board = minimax(game.board, WHITE_LEVEL, True, float('-inf'), float('inf'))
-               game.ai_move(new_board)
+        # the window keeps being drawn while the AI thinks, its progress is shown in the title
+        if search is not None:
+            if search.done():
+                pygame.display.set_caption("Checkers")
+                if search.move is not None:
+                    report_search(search.context.best)
+                if search.context.stats is not None and search.move is not None:
+                    search.context.stats.log()
+                move, search = search.move, None
+                if move is not None:
+                    game.ai_move(move)
+            else:
+                pygame.display.set_caption(f"Checkers - thinking: {search.progress()}")
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
                 break
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
+            # only changed squares are drawn, so the whole window is drawn again when it was covered or restored
+            if event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE):
+                game.invalidate()
+
+            # the human can't move while the AI is thinking
+            if event.type == pygame.MOUSEBUTTONDOWN and search is None:
                 pos = pygame.mouse.get_pos()
                 row, col = get_position_mouse(pos)
                 game.select(row, col)
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
+                    if search is not None:
+                        search.cancel()
+                        search = None
+                        pygame.display.set_caption("Checkers")
+                    if pondering is not None:
+                        pondering.cancel()
+                        pondering = None
+                    replies, reports = {}, {}
                     game.reset()
 
             if event.type == pygame.KEYDOWN:
@@ -54,6 +199,16 @@ def main() -> None:
         
         game.update()
     
+    if search is not None:
+        search.cancel()
+    if pondering is not None:
+        pondering.cancel()
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+    if tablebase is not None:
+        tablebase.close()
+    if book is not None:
+        book.close()
     pygame.quit()
 
 
@@ -80,6 +235,49 @@ if __name__ == "__main__":
                         type=int,
                         choices=range(1,8))
 
+    parser.add_argument("-t",
+                        "--movetime",
+                        help="time budget per AI move, e.g. 500ms or 2s - the AI searches as deep as it can in that time instead of its level's depth",
+                        type=parse_movetime)
+
+    parser.add_argument("-n",
+                        "--threads",
+                        help="number of processes searching the AI moves in parallel, default is 1",
+                        type=int,
+                        default=1)
+
+    parser.add_argument("-s",
+                        "--seed",
+                        help="seed of the AI's random choice between equally good moves, to replay the same games",
+                        type=int)
+
+    parser.add_argument("-d",
+                        "--deterministic",
+                        help="the AI always plays the best move it finds",
+                        action="store_true")
+
+    parser.add_argument("-e",
+                        "--tablebase",
+                        help="endgame tablebase file, made with python -m minimax.tablebase - the AI plays positions in it perfectly")
+
+    parser.add_argument("-o",
+                        "--book",
+                        help="opening book file, made with python -m minimax.book - the AI plays its first moves from it")
+
+    parser.add_argument("-r",
+                        "--ponder",
+                        help="the AI searches its replies to your likely moves while you think",
+                        action="store_true")
+
+    parser.add_argument("-f",
+                        "--weights",
+                        help="evaluation weights file, made with python -m minimax.tuning")
+
+    parser.add_argument("-v",
+                        "--stats",
+                        help="log the statistics of every AI search as JSON: nodes, cutoffs, branching factor, table and time per phase",
+                        action="store_true")
+
     args = parser.parse_args()
 
     if args.player == "None":
@@ -100,6 +298,18 @@ if __name__ == "__main__":
     if args.whitelevel and args.player != "WHITE":
         WHITE_LEVEL = args.whitelevel
 
+    MOVETIME = args.movetime
+    THREADS = args.threads
+    SEED = args.seed
+    DETERMINISTIC = args.deterministic
+    TABLEBASE = args.tablebase
+    BOOK = args.book
+    PONDER = args.ponder
+    WEIGHTS_FILE = args.weights
+    STATS = args.stats
+    if STATS:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     pygame.display.set_caption("Checkers")
     main()
 
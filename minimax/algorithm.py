@@ -1,106 +1,325 @@
-from copy import deepcopy
-from cachetools import cached, LRUCache
-from cachetools.keys import hashkey
-from ast import literal_eval
-from typing import Tuple
+from collections import namedtuple
+from threading import Event
+from time import perf_counter
+from typing import Optional, Tuple
+from checkers.move import Move
+from checkers.weights import WEIGHTS, Weights
+from minimax.ordering import MoveOrdering
+from minimax.selection import MoveSelector
+from minimax.stats import SearchStats
+from minimax.tablebase import Tablebase
+from minimax.transposition import EXACT, LOWER, UPPER, TranspositionTable
 
 BLACK = (0,0,0)
 WHITE = (255, 255, 255)
 
-# caching doesn't work too well on the recursive funciton. If you remove the depth from the hashkey's the game
-# will be a lot faster, but only in bursts of the depth length. This also makes the AI make a decision once every /depth/
-# moves. If depth is included the caching doesn't give any results. 
+# number of king moves without a skip after which the game is a tie, see Board.is_tie
+TIE_MOVES = 30
+
+# raised inside the search when its time is up or it's cancelled
+class SearchTimeout(Exception):
+    pass
+
+# result of a search at the root: the evaluation, the move, the depth and the nodes and time it took
+SearchResult = namedtuple('SearchResult', ['value', 'move', 'depth', 'nodes', 'time'])
+
+# state shared by every node of a single search: the transposition table, the move ordering, the endgame tablebase,
+# whether the leaves are searched further with quiescence, the weights the leaves are evaluated with, the time limit,
+# the cancel token, the node counters, the distance from the root of the node being searched and the collector
+# of the search statistics, None when they aren't collected
+class SearchContext:
+    def __init__(self, table: TranspositionTable = None, deadline: float = None, ordering: MoveOrdering = None,
+                 tablebase: Tablebase = None, quiescence: bool = True, cancel: Event = None, weights: Weights = WEIGHTS,
+                 stats: SearchStats = None) -> None:
+        self.table = table
+        self.ordering = ordering
+        self.tablebase = tablebase
+        self.quiescence = quiescence
+        self.weights = weights
+        self.stats = stats
+        # perf_counter() time after which the search is stopped, None for no limit
+        self.deadline = deadline
+        # event set from another thread to stop the search, None if it can't be cancelled
+        self.cancel = cancel
+        # all searched nodes, and the ones of them reached by the skips of quiescence
+        self.nodes = 0
+        self.qnodes = 0
+        self.ply = 0
+        # best move found so far at the root, as a SearchResult, to follow the search from another thread.
+        # Iterative deepening sets it to the deepest finished iteration between the iterations
+        self.best = None
+
+    # counts a visited node and stops the search if the time is up or it's cancelled,
+    # both are only checked every 64 nodes
+    def visit(self) -> None:
+        self.nodes += 1
+        if not self.nodes & 63:
+            if self.deadline is not None and perf_counter() > self.deadline:
+                raise SearchTimeout
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchTimeout
+
+# The main minimax function, it searches the passed board in place by making and unmaking moves on it
+# and returns the evaluation together with the best move to make.
+# If a context with a transposition table is passed, positions already searched to the same depth are not searched again
+# and the best move stored for a position is searched first. Positions in the context's tablebase get their exact result
+# without a search. If the context's time is up SearchTimeout is raised, the board is left as it was passed in
+def minimax(board: object, depth: int, max_player: tuple, alpha: float, beta: float, context: SearchContext = None) -> Tuple[float, Move]:
+    color = WHITE if max_player else BLACK
+    table = ordering = stats = None
+    if context is not None:
+        context.visit()
+        table = context.table
+        ordering = context.ordering
+        stats = context.stats
+        if stats is not None:
+            stats.node(context.ply)
+        if context.tablebase is not None:
+            score = context.tablebase.score(board, color)
+            if score is not None:
+                if stats is not None:
+                    stats.tablebase_hits += 1
+                return score, None
 
-# The main minimax function
-#@cached(LRUCache(maxsize=10000), key=lambda move, depth, max_player, alpha, beta: hashkey(move, max_player, depth))
-def minimax(move: object, depth: int, max_player: tuple, alpha: float, beta: float) -> Tuple[float, object]:
     if depth == 0:
-        return move.evaluate(), move
+        if context is not None and context.quiescence:
+            return quiescence(board, max_player, alpha, beta, context, counted=True), None
+        return board.evaluate(context.weights if context is not None else WEIGHTS), None
+
+    # the result of a position the tie can end within the depth depends on the tie counter, which isn't in the key
+    if table is not None and near_tie(board, depth):
+        table = None
+    hash_move = None
+    if table is not None:
+        key = board.get_hash(color)
+        entry = table.probe(key)
+        if entry is not None:
+            hash_move = entry.move
+            # entries are only trusted at the depth they were searched to, so the result
+            # doesn't depend on the order in which positions were visited
+            if entry.depth == depth:
+                if entry.flag == EXACT:
+                    if stats is not None:
+                        stats.table_cutoffs += 1
+                    return entry.value, entry.move
+                elif entry.flag == LOWER:
+                    alpha = max(alpha, entry.value)
+                else:
+                    beta = min(beta, entry.value)
+                if beta <= alpha:
+                    if stats is not None:
+                        stats.table_cutoffs += 1
+                    return entry.value, entry.move
+    alpha_start, beta_start = alpha, beta
+
+    # get all possible moves for a player, with the best move from the table first
+    moves = get_all_moves(board, color)
+    if ordering is not None:
+        moves = ordering.order(moves, context.ply, hash_move)
+    elif hash_move is not None and hash_move in moves:
+        moves.remove(hash_move)
+        moves.insert(0, hash_move)
+    best_move = moves[0] if moves else None
+    if stats is not None:
+        stats.expand(len(moves))
 
     # if white player, that tries to maximize the score
     if max_player:
         max_eval = float('-inf')
-        best_move = None
-        # get all possible moves for a player
-        for move in get_all_moves(move, WHITE):
-            # recursive call to minimax for evaulation of the board
-            evaluation = minimax(move, depth -1, False, alpha, beta)[0]
-            max_eval = max(max_eval, evaluation)
-            alpha = max(alpha, max_eval)
-            if max_eval == evaluation: 
+        for index, move in enumerate(moves):
+            # recursive call to minimax for evaulation of the board after the move, then take the move back
+            board.make_move(move)
+            if context is not None:
+                context.ply += 1
+            try:
+                evaluation = minimax(board, depth -1, False, alpha, beta, context)[0]
+            finally:
+                board.unmake_move(move)
+                if context is not None:
+                    context.ply -= 1
+            if evaluation > max_eval:
+                max_eval = evaluation
                 best_move = move
+            alpha = max(alpha, max_eval)
             # alpha beta pruning
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.cutoff(move, context.ply, depth)
+                if stats is not None:
+                    stats.cutoff(index, len(moves))
                 break
-            
-        return max_eval, best_move
-    
+        best_eval = max_eval
+
     # if black player, that tries to minimize the score
     else:
         min_eval = float('inf')
-        best_move = None
-        # get all possible moves for a player
-        for move in get_all_moves(move, BLACK):
-            # recursive call to minimax for evaulation of the board
-            evaluation = minimax(move, depth -1, True, alpha, beta)[0]
-            min_eval = min(min_eval, evaluation)
-            beta = min(beta, min_eval)
-            if min_eval == evaluation: 
+        for index, move in enumerate(moves):
+            # recursive call to minimax for evaulation of the board after the move, then take the move back
+            board.make_move(move)
+            if context is not None:
+                context.ply += 1
+            try:
+                evaluation = minimax(board, depth -1, True, alpha, beta, context)[0]
+            finally:
+                board.unmake_move(move)
+                if context is not None:
+                    context.ply -= 1
+            if evaluation < min_eval:
+                min_eval = evaluation
                 best_move = move
+            beta = min(beta, min_eval)
             # alpha beta pruning
             if beta <= alpha:
+                if ordering is not None:
+                    ordering.cutoff(move, context.ply, depth)
+                if stats is not None:
+                    stats.cutoff(index, len(moves))
                 break
+        best_eval = min_eval
+
+    # store the result with information whether it is the exact evaluation or only a bound of it
+    if table is not None:
+        if best_eval <= alpha_start:
+            flag = UPPER
+        elif best_eval >= beta_start:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, depth, flag, best_eval, best_move)
+
+    return best_eval, best_move
+
+# Quiescence search, called at the leaves of minimax instead of the evaluation. Skips are obligatory, so a position
+# where the side to move can skip isn't evaluated, all of its skips are searched until a position without skips is reached.
+# A side without any moves has lost. A leaf minimax has already counted is passed as counted, so the node counters
+# only get the nodes reached by the skips, which are counted in qnodes too
+def quiescence(board: object, max_player: bool, alpha: float, beta: float, context: SearchContext, counted: bool = False) -> float:
+    if not counted:
+        context.visit()
+        context.qnodes += 1
+    moves, skipping = board.get_valid_moves(WHITE if max_player else BLACK)
+    if not moves:
+        return float('-inf') if max_player else float('inf')
+    if not skipping:
+        return board.evaluate(context.weights)
+
+    best_eval = float('-inf') if max_player else float('inf')
+    for move in moves:
+        board.make_move(move)
+        context.ply += 1
+        try:
+            evaluation = quiescence(board, not max_player, alpha, beta, context)
+        finally:
+            board.unmake_move(move)
+            context.ply -= 1
+        if max_player:
+            best_eval = max(best_eval, evaluation)
+            alpha = max(alpha, best_eval)
+        else:
+            best_eval = min(best_eval, evaluation)
+            beta = min(beta, best_eval)
+        if beta <= alpha:
+            break
+    return best_eval
+
+# Picks the root move from the context's tablebase when the root and the positions after all of its moves are in it,
+# so that a root in the tablebase isn't searched at all. Returns the exact evaluation with the move to make,
+# picked by the selector as in search_root, or None when the tablebase can't score the root moves
+def probe_root(board: object, max_player: bool, context: SearchContext, selector: MoveSelector = None) -> Optional[Tuple[float, Move]]:
+    color, other = (WHITE, BLACK) if max_player else (BLACK, WHITE)
+    if context.tablebase is None or context.tablebase.score(board, color) is None:
+        return None
+    scores = []
+    for move in get_all_moves(board, color):
+        board.make_move(move)
+        try:
+            score = context.tablebase.score(board, other)
+            # a move that takes the last piece of the opponent leaves no table to look it up in
+            if score is None and not (board.white_left and board.black_left):
+                score = board.evaluate(context.weights)
+        finally:
+            board.unmake_move(move)
+        if score is None:
+            return None
+        scores.append((score, move))
+    if not scores:
+        return None
+    if context.stats is not None:
+        context.stats.tablebase_hits += 1
+    return (selector if selector is not None else MoveSelector(margin=0)).choose(scores, max_player)
+
+# searches the root moves of the board and returns the evaluation together with the move to make.
+# Without a selector it's the same as minimax, with a selector every move that can be within its margin
+# of the best move is evaluated exactly and the selector picks one of them. The best move so far is kept
+# in the context's best as every root move is searched. A root in the tablebase isn't searched, see probe_root
+def search_root(board: object, depth: int, max_player: bool, context: SearchContext = None, selector: MoveSelector = None) -> Tuple[float, Move]:
+    start = perf_counter()
+    if context is None:
+        context = SearchContext()
+    if context.stats is not None:
+        board = context.stats.attach(board, context)
+        context.stats.node(context.ply)
+    context.visit()
+    probed = probe_root(board, max_player, context, selector)
+    if probed is not None:
+        context.best = SearchResult(*probed, depth, context.nodes, perf_counter() - start)
+        if context.stats is not None:
+            context.stats.finish(board, WHITE if max_player else BLACK, depth)
+        return probed
+    margin = selector.margin if selector is not None else 0
+    color = WHITE if max_player else BLACK
+
+    # the best move stored in the table (e.g. by the previous iteration) is searched first
+    hash_move = None
+    if context.table is not None:
+        key = board.get_hash(color)
+        entry = context.table.probe(key)
+        if entry is not None:
+            hash_move = entry.move
+    moves = get_all_moves(board, color)
+    if context.ordering is not None:
+        moves = context.ordering.order(moves, context.ply, hash_move)
+    elif hash_move is not None and hash_move in moves:
+        moves.remove(hash_move)
+        moves.insert(0, hash_move)
+    if not moves:
+        return float('-inf') if max_player else float('inf'), None
+    if context.stats is not None:
+        context.stats.expand(len(moves))
+
+    scores = []
+    best_eval = float('-inf') if max_player else float('inf')
+    for move in moves:
+        board.make_move(move)
+        context.ply += 1
+        try:
+            if max_player:
+                evaluation = minimax(board, depth - 1, False, best_eval - margin, float('inf'), context)[0]
+            else:
+                evaluation = minimax(board, depth - 1, True, float('-inf'), best_eval + margin, context)[0]
+        finally:
+            board.unmake_move(move)
+            context.ply -= 1
+        if not scores or (evaluation > best_eval if max_player else evaluation < best_eval):
+            context.best = SearchResult(evaluation, move, depth, context.nodes, perf_counter() - start)
+        scores.append((evaluation, move))
+        best_eval = max(best_eval, evaluation) if max_player else min(best_eval, evaluation)
+
+    if context.table is not None and not near_tie(board, depth):
+        best_move = next(move for evaluation, move in scores if evaluation == best_eval)
+        context.table.store(key, depth, EXACT, best_eval, best_move)
+    if context.stats is not None:
+        context.stats.finish(board, color, depth)
+
+    if selector is None:
+        return next(score for score in scores if score[0] == best_eval)
+    return selector.choose(scores, max_player)
 
-        return min_eval, best_move
-
-# simulates the move
-def simulate_move(piece: object, move: list, board: object, skip: list, color: object) -> object:
-    # on the copied board make a move from the list of possible moves
-    board.move(piece, move[0], move[1])
-    
-    # if a piece is skipped during the simulated move, remove a skipped piece
-    if skip: 
-        removed_piece = board.get_piece(skip.row, skip.col)
-        board.remove_piece(removed_piece)
-
-        # if after skipping there is another skip available, keep current players turn and allow him to move only the selected piece.
-        piece = board.get_piece(piece.row, piece.col)
-        valid_moves, skipped = board.get_valid_moves(color)
-        if skipped and piece in valid_moves.keys(): 
-            for m, s in valid_moves[piece].items():
-                m = literal_eval(m)
-                s = board.get_piece(literal_eval(s)[0], literal_eval(s)[1])
-                simulate_move(piece, m, board, s, color)
-                return board
-            
-        # make a piece into a king if the piece is on the edge of the board
-        board.make_king(piece, move[0])    
-        # return the board modified by the simualted move
-        return board
-
-    # make a piece into a king if the piece is on the edge of the board
-    board.make_king(piece, move[0])    
-    # return the board modified by the simualted move
-    return board
+# Whether the tie rule can end the game within the depth. The transposition table is keyed by the pieces and the side
+# to move only, so results of such positions aren't probed nor stored, an entry stored with a lower tie counter would be wrong
+def near_tie(board: object, depth: int) -> bool:
+    return board.king_moves + depth >= TIE_MOVES
 
 # returns all possible moves for the current board state
 def get_all_moves(board: object, color: tuple) -> list:
-    possible_board_states = []
-    valid_moves, _ = board.get_valid_moves(color)
-    # for each piece with valid moves
-    for piece in valid_moves:
-        for move, skip in valid_moves[piece].items():
-            # change the string coordinates into a literal list
-            move = literal_eval(move)
-            # if that move has a skip, change the string coordinates into a literal list
-            if skip: 
-                skip = board.get_piece(literal_eval(skip)[0], literal_eval(skip)[1])
-            # make a deepcopy of the board
-            temp_board = deepcopy(board)
-            # get a piece from the copied board
-            temp_piece = temp_board.get_piece(piece.row, piece.col)
-            # simulate a move on the copied board
-            new_board = simulate_move(temp_piece, move, temp_board, skip, color)
-            possible_board_states.append(new_board)
-     
-    return possible_board_states
\ No newline at end of file
+    return board.get_valid_moves(color)[0]
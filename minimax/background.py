@@ -0,0 +1,45 @@
+from threading import Event, Thread
+from typing import Callable
+from checkers.move import Move
+from minimax.algorithm import SearchContext, SearchTimeout
+
+
+# Runs a search in a background thread, so that the window keeps responding while the AI thinks.
+# The search function gets the context of the search, which is created with a cancel token, and returns the move to make.
+# The board the search runs on mustn't be changed until it's done, so it should be a copy of the game's board
+class BackgroundSearch:
+    def __init__(self, search: Callable[[SearchContext], Move], context: SearchContext) -> None:
+        self.search = search
+        self.context = context
+        if context.cancel is None:
+            context.cancel = Event()
+        self.move = None
+        self.cancelled = False
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.move = self.search(self.context)
+        except SearchTimeout:
+            self.cancelled = True
+
+    # checks if the search has finished
+    def done(self) -> bool:
+        return not self.thread.is_alive()
+
+    # stops the search and waits for the thread to finish, which happens within 64 nodes.
+    # The move of a cancelled search is dropped
+    def cancel(self) -> None:
+        self.context.cancel.set()
+        self.thread.join()
+        self.cancelled = True
+        self.move = None
+
+    # returns a short description of how far the search has got: the depth being searched with the best move
+    # found so far, and the number of searched nodes
+    def progress(self) -> str:
+        best = self.context.best
+        if best is None:
+            return f'nodes {self.context.nodes}'
+        return f'depth {best.depth}, nodes {self.context.nodes}, best {best.move} ({best.value:.2f})'
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+from time import perf_counter
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from checkers.board import DIST_TO_KING
+from checkers.constants import ROWS
+from checkers.notation import BLACK_WON, DRAW, RECORD, WHITE_WON, to_bitboard
+from checkers.piece import BLACK_PIECE, WHITE_PIECE
+from checkers.squares import SQUARES
+from checkers.weights import WEIGHTS, Weights, load_weights
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# Positions are scored in batches as an (N, 4) array of the BitBoard masks (white men, white kings, black men,
+# black kings), with the king_moves counters in a separate array. The scores are the same as Board.evaluate gives.
+# numpy is only needed by this module, the search itself evaluates boards one by one from their counters
+WHITE_MEN, WHITE_KINGS, BLACK_MEN, BLACK_KINGS = range(4)
+
+# distance of every square to the promotion row of each side, as weights of the bits of a mask
+WHITE_DIST = np.array(DIST_TO_KING[WHITE_PIECE], dtype=np.float64)
+BLACK_DIST = np.array(DIST_TO_KING[BLACK_PIECE], dtype=np.float64)
+
+# records of a game log (see checkers.notation) as a numpy type, so the log can be mapped as an array
+LOG_RECORD = np.dtype([('masks', '<u8', (4,)), ('flags', 'u1'), ('result', 'i1'), ('ply', '<u2'), ('game', '<u4')])
+assert LOG_RECORD.itemsize == RECORD.size
+
+# positions scored at once when scoring a log, the bits of a chunk take 256 bytes per position
+CHUNK = 1 << 16
+
+
+# stacks the masks and king_moves counters of boards or bitboards into arrays
+def to_arrays(boards: Iterable[object]) -> Tuple[np.ndarray, np.ndarray]:
+    bitboards = [to_bitboard(board) for board in boards]
+    masks = np.array([(bitboard.white_men, bitboard.white_kings, bitboard.black_men, bitboard.black_kings)
+                      for bitboard in bitboards], dtype='<u8').reshape(-1, 4)
+    king_moves = np.array([bitboard.king_moves for bitboard in bitboards], dtype=np.int64)
+    return masks, king_moves
+
+
+# unpacks an (N, 4) array of masks into an (N, 4, SQUARES) array of the bits of every square
+def unpack(masks: np.ndarray) -> np.ndarray:
+    masks = np.ascontiguousarray(masks, dtype='<u8')
+    return np.unpackbits(masks.view(np.uint8).reshape(len(masks), 4, 8), axis=-1, bitorder='little')[..., :SQUARES]
+
+
+# returns the unweighted terms of Board.evaluation_features for every position of the masks array
+def evaluation_features(masks: np.ndarray) -> dict:
+    squares = unpack(masks)
+    white = squares[:, WHITE_MEN] | squares[:, WHITE_KINGS]
+    black = squares[:, BLACK_MEN] | squares[:, BLACK_KINGS]
+    white_left = white.sum(axis=1, dtype=np.int64)
+    black_left = black.sum(axis=1, dtype=np.int64)
+    white_kings = squares[:, WHITE_KINGS].sum(axis=1, dtype=np.int64)
+    black_kings = squares[:, BLACK_KINGS].sum(axis=1, dtype=np.int64)
+    white_dist = white @ WHITE_DIST
+    black_dist = black @ BLACK_DIST
+
+    # positions without the pieces of a side are scored by evaluate, their distance terms are left at 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average_king_dist_white = np.where(white_left > 0, white_left*ROWS - white_dist / white_left, 0.0)
+        average_king_dist_black = np.where(black_left > 0, (-1)*(black_left*ROWS - black_dist / black_left), 0.0)
+
+    return {
+        'pieces': white_left - black_left,
+        'kings': white_kings - black_kings,
+        'white_king_distance': average_king_dist_white,
+        'black_king_distance': average_king_dist_black,
+    }
+
+
+# returns the evaluation terms of Board.evaluation_terms for every position of the masks array
+def evaluation_terms(masks: np.ndarray, weights: Weights = WEIGHTS) -> dict:
+    features = evaluation_features(masks)
+    return {
+        'pieces': weights.man*features['pieces'],
+        'kings': weights.king*features['kings'],
+        'white_king_distance': weights.distance*features['white_king_distance'],
+        'black_king_distance': weights.distance*features['black_king_distance'],
+    }
+
+
+# returns an (N, len(Weights)) array of the features every weight multiplies, the scores of the positions
+# (without the won positions and ties) are the product of it with the weights
+def feature_matrix(masks: np.ndarray) -> np.ndarray:
+    features = evaluation_features(masks)
+    return np.stack([features['pieces'], features['kings'],
+                     features['white_king_distance'] + features['black_king_distance']], axis=1).astype(np.float64)
+
+
+# Scores every position of the masks array like Board.evaluate in one vectorized call: -inf if white has
+# no pieces, inf if black has none, 0 for a tie by the king_moves counters and the sum of the terms otherwise
+def evaluate(masks: np.ndarray, king_moves: np.ndarray = None, weights: Weights = WEIGHTS) -> np.ndarray:
+    masks = np.asarray(masks, dtype='<u8').reshape(-1, 4)
+    terms = evaluation_terms(masks, weights)
+    scores = terms['pieces'] + terms['kings'] + terms['white_king_distance'] + terms['black_king_distance']
+    if king_moves is not None:
+        scores = np.where(np.asarray(king_moves) == 30, 0.0, scores)
+    scores = np.where((masks[:, BLACK_MEN] | masks[:, BLACK_KINGS]) == 0, np.inf, scores)
+    return np.where((masks[:, WHITE_MEN] | masks[:, WHITE_KINGS]) == 0, -np.inf, scores)
+
+
+# Expands the frontier of the board: every position reachable in exactly depth moves, like perft counts them.
+# The positions are collected as masks and king_moves counters, so they can be scored in bulk with evaluate
+def expand(board: object, depth: int, color: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    # a Board is expanded as a BitBoard, which has the masks, a BitBoard is expanded in place
+    bitboard = to_bitboard(board)
+    positions = []
+
+    def walk(depth: int, color: tuple) -> None:
+        if depth == 0:
+            positions.append((bitboard.white_men, bitboard.white_kings, bitboard.black_men, bitboard.black_kings,
+                              bitboard.king_moves))
+            return
+        next_color = BLACK if color == WHITE else WHITE
+        for move in bitboard.get_valid_moves(color)[0]:
+            bitboard.make_move(move)
+            walk(depth - 1, next_color)
+            bitboard.unmake_move(move)
+
+    walk(depth, color)
+    frontier = np.array(positions, dtype='<u8').reshape(-1, 5)
+    return frontier[:, :4], frontier[:, 4].astype(np.int64)
+
+
+# Maps the records of a game log into a numpy array of LOG_RECORD, without reading the file into memory.
+# A record still being written at the end of the log is left out, like read_log does
+def load_log(path: str) -> np.ndarray:
+    records = os.path.getsize(path) // LOG_RECORD.itemsize
+    if not records:
+        return np.zeros(0, dtype=LOG_RECORD)
+    return np.memmap(path, dtype=LOG_RECORD, mode='r', shape=(records,))
+
+
+# scores every position of a game log, chunk by chunk so that the unpacked bits of a big log don't fill the memory
+def score_log(path: str, chunk: int = CHUNK, weights: Weights = WEIGHTS) -> np.ndarray:
+    records = load_log(path)
+    scores = np.empty(len(records), dtype=np.float64)
+    for start in range(0, len(records), chunk):
+        part = records[start:start + chunk]
+        scores[start:start + chunk] = evaluate(part['masks'], part['flags'] >> 1, weights)
+    return scores
+
+
+# Scores the positions of game logs written by self-play, prints the speed and the mean score of the positions
+# by the result of their game as JSON:
+# python -m minimax.batch games.bin
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("logs", help="game logs to score", nargs="+")
+    parser.add_argument("-f", "--weights", help="evaluation weights file, default are the built-in weights")
+    args = parser.parse_args()
+
+    weights = load_weights(args.weights) if args.weights else WEIGHTS
+    for path in args.logs:
+        start = perf_counter()
+        scores = score_log(path, weights=weights)
+        elapsed = perf_counter() - start
+        results = load_log(path)['result']
+        # won and lost positions are left out of the means
+        finite = np.isfinite(scores)
+        means = {}
+        for name, result in (('white_won', WHITE_WON), ('draw', DRAW), ('black_won', BLACK_WON)):
+            selected = finite & (results == result)
+            means[name] = float(scores[selected].mean()) if selected.any() else None
+        print(json.dumps({
+            'log': path,
+            'positions': len(scores),
+            'time': elapsed,
+            'positions_per_sec': len(scores) / elapsed if elapsed else 0.0,
+            'mean_score': means,
+        }))
@@ -0,0 +1,187 @@
+import argparse
+import json
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter
+try:
+    import resource
+except ImportError:
+    # not available on windows
+    resource = None
+
+from checkers.bitboard import BitBoard
+from minimax.algorithm import SearchContext, search_root
+from minimax.ordering import MoveOrdering
+from minimax.stats import SearchStats
+from minimax.transposition import TranspositionTable
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# Fixed positions for measuring the engine, squares are numbered from 1 as in draughts notation.
+# Each position is (white to move, white men, white kings, black men, black kings)
+POSITIONS = {
+    'start': (True, list(range(31, 51)), [], list(range(1, 21)), []),
+    'opening': (True, [31, 34, 35, 36, 37, 39, 40, 41, 42, 43, 44, 45, 46, 47, 48, 49, 50], [],
+                [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 14, 15, 16, 19, 20, 22], []),
+    'middlegame': (True, [32, 34, 35, 36, 40, 42, 44, 45, 46, 47, 48, 49, 50], [],
+                   [1, 2, 3, 4, 5, 6, 8, 11, 14, 15, 19, 20, 23], []),
+    'late_middlegame': (True, [27, 34, 35, 41, 42, 43, 44, 46, 50], [], [1, 4, 6, 10, 13, 16, 20, 21, 25], []),
+    'kings_and_men': (True, [41], [18, 33], [10], [8, 44]),
+    'kings_endgame': (True, [], [3, 46], [], [5, 26]),
+    'three_kings': (True, [], [2, 4, 49], [], [27, 30]),
+}
+
+# search depths of the benchmark
+DEPTHS = (2, 4, 6)
+
+# Modules of the rules and the search, they have to import without pygame and numpy, so that headless workers
+# and scripts don't load SDL and work without a display, and within the budget in seconds
+CORE_MODULES = ('checkers.board', 'checkers.bitboard', 'checkers.game', 'checkers.notation', 'minimax.search',
+                'minimax.parallel', 'minimax.book', 'minimax.tablebase', 'minimax.ponder', 'minimax.background')
+HEAVY_MODULES = ('pygame', 'numpy')
+IMPORT_BUDGET = 0.25
+
+
+# creates a board with the pieces of one of the POSITIONS
+def create_position(white_men: list, white_kings: list, black_men: list, black_kings: list) -> object:
+    def mask(squares: list) -> int:
+        return sum(1 << (square - 1) for square in squares)
+    return BitBoard(mask(white_men), mask(white_kings), mask(black_men), mask(black_kings)).to_board()
+
+
+# measures how many times per second all moves of the side to move are generated
+def bench_move_generation(board: object, color: tuple, seconds: float = 0.5) -> dict:
+    calls = 0
+    start = perf_counter()
+    while perf_counter() - start < seconds:
+        board.get_valid_moves(color)
+        calls += 1
+    elapsed = perf_counter() - start
+    return {'calls': calls, 'calls_per_sec': calls / elapsed, 'moves': len(board.get_valid_moves(color)[0])}
+
+
+# measures the time of a board copy, and the memory per position of board copies and of just their piece buffers
+def bench_board_memory(board: object, copies: int = 1000) -> dict:
+    start = perf_counter()
+    for _ in range(copies):
+        board.copy()
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    boards = [board.copy() for _ in range(copies)]
+    board_memory = tracemalloc.get_traced_memory()[0]
+    del boards
+    start_memory = tracemalloc.get_traced_memory()[0]
+    positions = [bytes(board.squares) for _ in range(copies)]
+    position_memory = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+    del positions
+
+    return {
+        'copy_time': elapsed / copies,
+        'board_bytes': board_memory / copies,
+        'position_bytes': position_memory / copies,
+    }
+
+
+# searches the board to a fixed depth from scratch, then again with tracemalloc for the peak memory of the search,
+# and if stats is set once more with statistics, as they slow the search down
+def bench_search(board: object, max_player: bool, depth: int, quiescence: bool = True, stats: bool = False) -> dict:
+    context = SearchContext(TranspositionTable(), ordering=MoveOrdering(), quiescence=quiescence)
+    start = perf_counter()
+    value, move = search_root(board, depth, max_player, context)
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    search_root(board, depth, max_player, SearchContext(TranspositionTable(), ordering=MoveOrdering(), quiescence=quiescence))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        'depth': depth,
+        'nodes': context.nodes,
+        'qnodes': context.qnodes,
+        'time_to_depth': elapsed,
+        'nodes_per_sec': context.nodes / elapsed if elapsed else 0.0,
+        'peak_memory': peak,
+        'value': value,
+        'move': repr(move),
+    }
+    if stats:
+        search_stats = SearchStats()
+        search_root(board, depth, max_player, SearchContext(TranspositionTable(), ordering=MoveOrdering(), quiescence=quiescence,
+                                                            stats=search_stats))
+        result['stats'] = search_stats.to_dict()
+    return result
+
+
+# Imports the core modules in fresh interpreters and keeps the fastest of the runs, as the first ones also
+# warm up the disk cache. Also lists the heavy modules that were loaded along with them
+def bench_imports(runs: int = 5, budget: float = IMPORT_BUDGET) -> dict:
+    script = (
+        'import sys\n'
+        'from time import perf_counter\n'
+        'start = perf_counter()\n'
+        f'import {", ".join(CORE_MODULES)}\n'
+        'elapsed = perf_counter() - start\n'
+        f'print(elapsed, *[name for name in {HEAVY_MODULES!r} if name in sys.modules])\n'
+    )
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(output[0]))
+        heavy = output[1:]
+    return {
+        'import_time': min(times),
+        'budget': budget,
+        'heavy_modules': heavy,
+        'ok': min(times) <= budget and not heavy,
+    }
+
+
+# runs the whole benchmark over the passed positions and depths
+def run(positions: dict, depths: tuple, quiescence: bool = True, stats: bool = False) -> dict:
+    results = {}
+    for name, (white_to_move, *pieces) in positions.items():
+        board = create_position(*pieces)
+        results[name] = {
+            'move_generation': bench_move_generation(board, WHITE if white_to_move else BLACK),
+            'memory': bench_board_memory(board),
+            'search': [bench_search(board, white_to_move, depth, quiescence, stats) for depth in depths],
+        }
+    # peak resident memory of the whole process, in kilobytes on linux
+    if resource is not None:
+        results['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results
+
+
+# Headless benchmark of the engine, prints the results as JSON:
+# python -m minimax.bench
+# python -m minimax.bench -p start kings_endgame -d 4 5 -o bench.json
+# python -m minimax.bench -i
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", "--positions", help="positions to run, default is all", nargs="+", choices=list(POSITIONS))
+    parser.add_argument("-d", "--depths", help="search depths, default is 2 4 6", type=int, nargs="+", default=list(DEPTHS))
+    parser.add_argument("-o", "--output", help="file to write the JSON results to instead of printing them")
+    parser.add_argument("-q", "--no-quiescence", help="search without quiescence at the leaves", action="store_true")
+    parser.add_argument("-s", "--stats", help="add the statistics of every search, from an extra search with them", action="store_true")
+    parser.add_argument("-i", "--imports", help=f"only measure the import time of the engine, fails if it's over {IMPORT_BUDGET}s "
+                        "or loads pygame or numpy", action="store_true")
+    args = parser.parse_args()
+
+    if args.imports:
+        result = bench_imports()
+        print(json.dumps(result))
+        if not result['ok']:
+            raise SystemExit(1)
+    else:
+        positions = {name: POSITIONS[name] for name in args.positions} if args.positions else POSITIONS
+        results = json.dumps(run(positions, tuple(args.depths), not args.no_quiescence, args.stats), indent=2)
+        if args.output:
+            with open(args.output, 'w') as file:
+                file.write(results)
+        else:
+            print(results)
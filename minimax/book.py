@@ -0,0 +1,157 @@
+import argparse
+import json
+import mmap
+import struct
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import Iterable, List, Optional, Tuple
+
+from checkers.board import Board
+from checkers.move import Move
+from checkers.notation import game_from_pdn
+from minimax.algorithm import SearchContext, search_root
+from minimax.ordering import MoveOrdering
+from minimax.selection import MARGIN, MoveSelector
+from minimax.transposition import TranspositionTable
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# Opening book file: the header, then entries sorted by the zobrist hash of the position (with the side to move),
+# each with the start and end square of a move played in the position and how many times it was played
+MAGIC = b'DRBK'
+HEADER = struct.Struct('<4sI')
+ENTRY = struct.Struct('<QBBI')
+
+# default number of moves from the start of a game that are put into the book
+PLIES = 10
+
+
+# counts the moves played in the first plies of the games, by the hash of the position they were played in
+def count_moves(games: Iterable[List[Move]], plies: int = PLIES) -> Counter:
+    counts = Counter()
+    for moves in games:
+        board = Board()
+        color = WHITE
+        for move in moves[:plies]:
+            counts[board.get_hash(color), move.start, move.end] += 1
+            board.make_move(move)
+            color = BLACK if color == WHITE else WHITE
+    return counts
+
+
+# writes the counted moves into a book file, sorted so that the book can be searched by the hash
+def save(counts: Counter, path: str) -> None:
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(counts)))
+        for (key, start, end), weight in sorted(counts.items()):
+            file.write(ENTRY.pack(key, start, end, weight))
+
+
+# plays the first plies of a game from the start position with the engine, the seed makes it pick other good moves
+def play_opening(seed: int, depth: int, plies: int = PLIES, margin: float = MARGIN) -> List[Move]:
+    board = Board()
+    table = TranspositionTable(1 << 16)
+    selector = MoveSelector(seed, margin)
+    color = WHITE
+    moves = []
+    for _ in range(plies):
+        table.new_search()
+        move = search_root(board, depth, color == WHITE, SearchContext(table, ordering=MoveOrdering()), selector)[1]
+        if move is None:
+            break
+        board.make_move(move)
+        moves.append(move)
+        color = BLACK if color == WHITE else WHITE
+    return moves
+
+
+# plays the openings of the passed number of games in worker processes
+def self_play(games: int, depth: int, plies: int = PLIES, workers: int = None, seed: int = 0) -> List[List[Move]]:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(play_opening, range(seed, seed + games), [depth] * games, [plies] * games))
+
+
+# Opening book file opened for lookups. The file is memory mapped and the entries of a position are
+# found with a binary search over the hashes, so a lookup only reads a few entries of the file
+class OpeningBook:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an opening book file')
+
+    def close(self) -> None:
+        self.data.close()
+
+    # hash of the entry at the index
+    def _key(self, index: int) -> int:
+        return ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)[0]
+
+    # returns the (start, end, weight) of every book move of the position with the hash
+    def entries(self, key: int) -> List[Tuple[int, int, int]]:
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        for index in range(low, self.size):
+            entry_key, start, end, weight = ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append((start, end, weight))
+        return entries
+
+    # returns the valid moves of the board that are in the book, with their weights
+    def moves(self, board: object, color: tuple) -> List[Tuple[Move, int]]:
+        entries = self.entries(board.get_hash(color))
+        if not entries:
+            return []
+        valid = board.get_valid_moves(color)[0]
+        moves = []
+        for start, end, weight in entries:
+            # the first of the moves between the same squares, they only differ in skips with the same start and end
+            move = next((move for move in valid if move.start == start and move.end == end), None)
+            if move is not None:
+                moves.append((move, weight))
+        return moves
+
+    # Picks a book move for the board, or None if the position isn't in the book.
+    # Moves are picked at random by their weight, without a random generator the most played move is picked
+    def choose(self, board: object, color: tuple, random: Random = None) -> Optional[Move]:
+        moves = self.moves(board, color)
+        if not moves:
+            return None
+        if random is None:
+            return max(moves, key=lambda entry: entry[1])[0]
+        return random.choices([move for move, _ in moves], [weight for _, weight in moves])[0]
+
+
+# Builds an opening book from engine self-play and PDN games:
+# python -m minimax.book -g 500 -d 4 -o book.bin
+# python -m minimax.book -g 0 --pdn games.pdn -o book.bin
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", help="book file to write, default is book.bin", default="book.bin")
+    parser.add_argument("-g", "--games", help="number of self-play openings, default is 200", type=int, default=200)
+    parser.add_argument("-d", "--depth", help="search depth of the self-play, default is 4", type=int, default=4)
+    parser.add_argument("-p", "--plies", help=f"moves from the start of every game put into the book, default is {PLIES}", type=int, default=PLIES)
+    parser.add_argument("-n", "--workers", help="number of processes playing the openings, default is the number of cpus", type=int)
+    parser.add_argument("-s", "--seed", help="seed of the first self-play opening, default is 0", type=int, default=0)
+    parser.add_argument("--pdn", help="PDN files with one game each to add to the book", nargs="+", default=[])
+    args = parser.parse_args()
+
+    games = self_play(args.games, args.depth, args.plies, args.workers, args.seed) if args.games else []
+    for path in args.pdn:
+        with open(path) as file:
+            games.append(game_from_pdn(file.read()))
+    counts = count_moves(games, args.plies)
+    save(counts, args.output)
+    print(json.dumps({'output': args.output, 'games': len(games), 'positions': len({key for key, _, _ in counts}), 'moves': len(counts)}))
@@ -0,0 +1,75 @@
+from typing import List
+from checkers.move import Move
+from checkers.squares import SQUARES
+
+# deepest ply that has killer moves kept
+MAX_PLY = 128
+
+# sorting scores of move categories, a higher score is searched first. History scores stay far below the killers
+HASH_MOVE = 1 << 40
+CAPTURE = 1 << 36
+PROMOTION = 1 << 34
+KILLER = 1 << 32
+
+
+# Orders moves so that alpha beta pruning cuts off as early as possible: the best move from the transposition table
+# goes first, then skips by the number of pieces taken, promotions, killer moves of the ply (quiet moves that caused
+# a cutoff in a sibling node) and the rest by the history of cutoffs caused by the same from-to move
+class MoveOrdering:
+    def __init__(self) -> None:
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[0] * SQUARES for _ in range(SQUARES)]
+
+    # returns the moves sorted from the most to the least promising
+    def order(self, moves: List[Move], ply: int, hash_move: Move = None) -> List[Move]:
+        killers = self.killers[ply] if ply < MAX_PLY else ()
+        history = self.history
+
+        def score(move: Move) -> int:
+            if move == hash_move:
+                return HASH_MOVE
+            value = 0
+            if move.captured:
+                value += CAPTURE + len(move.captured)
+            if move.promotion:
+                value += PROMOTION
+            if move in killers:
+                value += KILLER
+            return value + history[move.path[0]][move.path[-1]]
+
+        return sorted(moves, key=score, reverse=True)
+
+    # remembers a move that caused a beta cutoff. Skips are searched first anyway, so only quiet moves are kept
+    def cutoff(self, move: Move, ply: int, depth: int) -> None:
+        if move.captured:
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history[move.path[0]][move.path[-1]] += depth * depth
+
+
+# branching factor of a uniform tree with the same number of nodes at the same depth,
+# the lower it is the more the pruning cut off
+def effective_branching_factor(nodes: int, depth: int) -> float:
+    return nodes ** (1 / depth) if depth else 0.0
+
+
+# compares node counts of fixed depth searches with and without move ordering
+if __name__ == "__main__":
+    import argparse
+    from checkers.board import Board
+    from minimax.algorithm import SearchContext, minimax
+    from minimax.transposition import TranspositionTable
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--depth", help="search depth, default is 5", type=int, default=5)
+    args = parser.parse_args()
+
+    board = Board()
+    for name, context in (("generator order", SearchContext(TranspositionTable())),
+                          ("move ordering", SearchContext(TranspositionTable(), ordering=MoveOrdering()))):
+        minimax(board, args.depth, True, float('-inf'), float('inf'), context)
+        print(f"{name}: {context.nodes} nodes, effective branching factor {effective_branching_factor(context.nodes, args.depth):.2f}")
@@ -0,0 +1,212 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, TimeoutError
+from multiprocessing import Value
+from time import perf_counter
+from typing import Optional, Tuple
+from checkers.move import Move
+from checkers.weights import WEIGHTS, Weights
+from minimax.algorithm import SearchContext, SearchResult, SearchTimeout, get_all_moves, minimax, near_tie, probe_root
+from minimax.ordering import MoveOrdering
+from minimax.selection import MoveSelector
+from minimax.stats import SearchStats
+from minimax.tablebase import Tablebase
+from minimax.transposition import EXACT, TranspositionTable
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# transposition table of a worker process, kept between the moves it searches, the endgame tablebase it probes,
+# the weights it evaluates the positions with and the generation of the searches of the pool
+_table = None
+_tablebase = None
+_weights = WEIGHTS
+_generation = None
+
+
+# Cancel token of a move searched in a worker process. The pool shares a generation counter with its workers,
+# which parallel_search moves on when its search is over, so a worker still searching for that search stops
+# within 64 nodes instead of searching a stale position until it's done
+class _StaleToken:
+    def __init__(self, generation: int) -> None:
+        self.generation = generation
+
+    def is_set(self) -> bool:
+        return _generation.value != self.generation
+
+
+# sets up a worker process of the pool, every worker maps the tablebase file on its own
+def init_worker(tablebase: str = None, weights: Weights = WEIGHTS, generation: Value = None) -> None:
+    global _table, _tablebase, _weights, _generation
+    _table = TranspositionTable()
+    _tablebase = Tablebase(tablebase) if tablebase else None
+    _weights = weights
+    _generation = generation
+
+
+# creates a pool of worker processes for parallel_search, with the path of the tablebase they probe and their weights.
+# The pool keeps the generation counter it shares with its workers
+def create_pool(workers: int, tablebase: str = None, weights: Weights = WEIGHTS) -> ProcessPoolExecutor:
+    generation = Value('i', 0)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(tablebase, weights, generation))
+    pool.generation = generation
+    return pool
+
+
+# task that does nothing, to start a worker process
+def _ready() -> None:
+    pass
+
+
+# Starts the worker processes of the pool and waits until they are set up. The pool only starts them as tasks are
+# submitted to it, and each of them creates its transposition table first, which would count in the first search
+def warm_up(pool: ProcessPoolExecutor, workers: int) -> None:
+    for future in [pool.submit(_ready) for _ in range(workers)]:
+        future.result()
+
+
+# Searches a single root move in a worker process, returns its evaluation, the numbers of searched nodes and
+# quiescence nodes, and the statistics of the search if they are collected, None otherwise.
+# The search stops with SearchTimeout once the generation of the pool is no longer the one it was submitted with
+def search_move(board: object, move: Move, depth: int, max_player: bool, alpha: float, beta: float, deadline: float = None,
+                generation: int = None, stats: bool = False) -> Tuple[float, int, int, Optional[SearchStats]]:
+    table = _table if _table is not None else TranspositionTable()
+    table.new_search()
+    cancel = _StaleToken(generation) if generation is not None and _generation is not None else None
+    context = SearchContext(table, deadline, MoveOrdering(), _tablebase, weights=_weights, cancel=cancel,
+                            stats=SearchStats() if stats else None)
+    if context.stats is not None:
+        board = context.stats.attach(board, context)
+    board.make_move(move)
+    evaluation = minimax(board, depth - 1, not max_player, alpha, beta, context)[0]
+    if context.stats is not None:
+        # the statistics are sent back without the context, which holds the worker's table
+        context.stats.context = None
+    return evaluation, context.nodes, context.qnodes, context.stats
+
+
+# waits for the result of a worker, checking every 50ms whether the search was cancelled in the meantime
+def _wait(future: Future, context: SearchContext) -> Tuple[float, int, int, Optional[SearchStats]]:
+    while context.cancel is not None:
+        try:
+            return future.result(timeout=0.05)
+        except TimeoutError:
+            if context.cancel.is_set():
+                raise SearchTimeout
+    return future.result()
+
+
+# waits for the result of a worker, adds its counters and statistics to the context and returns its evaluation
+def _result(future: Future, context: SearchContext) -> float:
+    evaluation, nodes, qnodes, stats = _wait(future, context)
+    context.nodes += nodes
+    context.qnodes += qnodes
+    if stats is not None:
+        # the worker's search starts after the root move
+        context.stats.merge(stats, context.ply + 1)
+    return evaluation
+
+
+# Root parallel minimax, the root moves are split between the worker processes of the executor. The first move
+# is searched alone to get a bound, then all the other moves are searched in parallel against that bound.
+# Root moves are ordered as in the serial search and without a selector the first move with the best evaluation wins,
+# so the best move is the same as the one of minimax at the same depth. With a selector, moves within its margin
+# of the bound are evaluated exactly and the selector picks one of them, as in search_root.
+# The context's deadline is passed to the workers, its node counters and statistics get the workers' ones and its best
+# the best move so far, as the results of the workers come in.
+# If the context is cancelled, the workers of a pool made by create_pool stop the moves they are searching.
+# A root in the tablebase isn't searched, see probe_root
+def parallel_search(board: object, depth: int, max_player: bool, executor: Executor, context: SearchContext = None,
+                    first_move: Move = None, selector: MoveSelector = None) -> Tuple[float, Move]:
+    start = perf_counter()
+    if context is None:
+        context = SearchContext()
+    color = WHITE if max_player else BLACK
+    if context.stats is not None:
+        context.stats.begin(context)
+        context.stats.node(context.ply)
+    context.visit()
+    probed = probe_root(board, max_player, context, selector)
+    if probed is not None:
+        context.best = SearchResult(*probed, depth, context.nodes, perf_counter() - start)
+        if context.stats is not None:
+            context.stats.finish(board, color, depth)
+        return probed
+    moves = MoveOrdering().order(get_all_moves(board, color), 0, first_move)
+    if not moves:
+        return float('-inf') if max_player else float('inf'), None
+    if context.stats is not None:
+        context.stats.expand(len(moves))
+    stats = context.stats is not None
+
+    shared = getattr(executor, 'generation', None)
+    generation = shared.value if shared is not None else None
+    futures = []
+    try:
+        best_eval = _result(executor.submit(search_move, board, moves[0], depth, max_player,
+                                            float('-inf'), float('inf'), context.deadline, generation, stats), context)
+        context.best = SearchResult(best_eval, moves[0], depth, context.nodes, perf_counter() - start)
+        scores = [(best_eval, moves[0])]
+
+        # evaluations that can't get within the margin of the first move come back as bounds,
+        # which is all that's needed to discard them
+        margin = selector.margin if selector is not None else 0
+        if max_player:
+            alpha, beta = best_eval - margin, float('inf')
+        else:
+            alpha, beta = float('-inf'), best_eval + margin
+        futures = [executor.submit(search_move, board, move, depth, max_player, alpha, beta, context.deadline, generation, stats)
+                   for move in moves[1:]]
+        for move, future in zip(moves[1:], futures):
+            evaluation = _result(future, context)
+            if evaluation > context.best.value if max_player else evaluation < context.best.value:
+                context.best = SearchResult(evaluation, move, depth, context.nodes, perf_counter() - start)
+            scores.append((evaluation, move))
+    finally:
+        # if the time is up or the search is cancelled, moves that haven't started yet aren't searched at all
+        # and the ones being searched are stopped
+        for future in futures:
+            future.cancel()
+        if shared is not None:
+            with shared.get_lock():
+                shared.value += 1
+
+    # the root is stored as in search_root, so the principal variation of the statistics starts with the best move
+    best_eval = (max if max_player else min)(evaluation for evaluation, _ in scores)
+    if context.table is not None and not near_tie(board, depth):
+        context.table.store(board.get_hash(color), depth, EXACT, best_eval,
+                            next(move for evaluation, move in scores if evaluation == best_eval))
+    if context.stats is not None:
+        context.stats.finish(board, color, depth)
+
+    if selector is None:
+        selector = MoveSelector(margin=0)
+    return selector.choose(scores, max_player)
+
+
+# reports speedup of the parallel search over the serial one at a fixed depth, with a deterministic evaluation
+if __name__ == "__main__":
+    import argparse
+    import json
+    from checkers.board import Board
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--depth", help="search depth, default is 6", type=int, default=6)
+    parser.add_argument("-w", "--workers", help="worker counts to compare, default is 1 2 4 8 16", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    board = Board()
+
+    # the table is created before the clock starts, as the workers create theirs in warm_up
+    context = SearchContext(TranspositionTable(), ordering=MoveOrdering())
+    start = perf_counter()
+    serial_eval, serial_move = minimax(board, args.depth, True, float('-inf'), float('inf'), context)
+    serial_time = perf_counter() - start
+    print(json.dumps({'workers': 0, 'time': serial_time, 'move': repr(serial_move)}))
+
+    for workers in args.workers:
+        with create_pool(workers) as pool:
+            warm_up(pool, workers)
+            start = perf_counter()
+            evaluation, move = parallel_search(board, args.depth, True, pool)
+            elapsed = perf_counter() - start
+        print(json.dumps({'workers': workers, 'time': elapsed, 'speedup': serial_time / elapsed,
+                          'move': repr(move), 'same_move': move == serial_move and evaluation == serial_eval}))
@@ -0,0 +1,102 @@
+import argparse
+import json
+from time import perf_counter
+from typing import List, Tuple
+
+from checkers.bitboard import BitBoard
+from checkers.board import Board
+from checkers.move import Move
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# Leaf counts from the start position with white to move, computed with both Board and BitBoard.
+# Every skip may be chosen (there's no majority capture rule) and multi-jumps over the same pieces along
+# different paths are different moves, so from depth 5 on the counts are higher than the usual
+# international draughts ones (27117, 167140, 1049442)
+KNOWN = {
+    1: 9,
+    2: 81,
+    3: 658,
+    4: 4265,
+    5: 27132,
+    6: 168316,
+    7: 1060829,
+}
+
+
+# counts the leaf positions reachable from the board in exactly depth moves, the board is searched in place
+def perft(board: object, depth: int, color: tuple) -> int:
+    if depth == 0:
+        return 1
+    moves = board.get_valid_moves(color)[0]
+    # the moves of the last level don't have to be made to be counted
+    if depth == 1:
+        return len(moves)
+
+    next_color = BLACK if color == WHITE else WHITE
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        try:
+            nodes += perft(board, depth - 1, next_color)
+        finally:
+            board.unmake_move(move)
+    return nodes
+
+
+# returns the leaf count of every root move, useful to find which move a generator gets wrong
+def divide(board: object, depth: int, color: tuple) -> List[Tuple[Move, int]]:
+    next_color = BLACK if color == WHITE else WHITE
+    counts = []
+    for move in board.get_valid_moves(color)[0]:
+        board.make_move(move)
+        try:
+            counts.append((move, perft(board, depth - 1, next_color)))
+        finally:
+            board.unmake_move(move)
+    return counts
+
+
+# runs perft from the start position to every depth up to the passed one and compares the counts to KNOWN
+def run(board: object, depth: int) -> List[dict]:
+    results = []
+    for current in range(1, depth + 1):
+        start = perf_counter()
+        nodes = perft(board, current, WHITE)
+        elapsed = perf_counter() - start
+        results.append({
+            'depth': current,
+            'nodes': nodes,
+            'expected': KNOWN.get(current),
+            'correct': nodes == KNOWN[current] if current in KNOWN else None,
+            'time': elapsed,
+            'moves_per_sec': nodes / elapsed if elapsed else 0.0,
+        })
+    return results
+
+
+# Counts the moves of the start position, prints one JSON line per depth:
+# python -m minimax.perft -d 6
+# python -m minimax.perft -d 5 --bitboard
+# python -m minimax.perft -d 4 --divide
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--depth", help="perft depth, default is 5", type=int, default=5)
+    parser.add_argument("--divide", help="print the count of every root move at the passed depth", action="store_true")
+    parser.add_argument("--bitboard", help="count the moves of BitBoard instead of Board", action="store_true")
+    args = parser.parse_args()
+
+    board = BitBoard.create_board() if args.bitboard else Board()
+    if args.divide:
+        counts = divide(board, args.depth, WHITE)
+        for move, nodes in counts:
+            print(f'{move}: {nodes}')
+        print(f'total: {sum(nodes for _, nodes in counts)}, expected: {KNOWN.get(args.depth)}')
+    else:
+        failed = False
+        for result in run(board, args.depth):
+            print(json.dumps(result))
+            failed = failed or result['correct'] is False
+        if failed:
+            raise SystemExit(1)
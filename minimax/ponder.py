@@ -0,0 +1,48 @@
+from typing import Callable, Dict
+from checkers.move import Move
+from minimax.algorithm import SearchContext, SearchTimeout, get_all_moves, minimax
+from minimax.ordering import MoveOrdering
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# depth of the search that orders the opponent's moves from the most to the least likely
+ORDER_DEPTH = 2
+
+
+# Searches on the opponent's time. For every move the opponent can make, from the most likely one, the move is made
+# and the reply is searched with the passed search function, the same one the AI makes its moves with.
+# Replies are kept in results under the hash of the position they are for, so when the opponent's move is one
+# of them the reply can be played right away. The searches fill the context's transposition table too,
+# so even a move that wasn't pondered on is searched faster. The search runs until all moves are pondered on
+# or the context is cancelled, which happens when the opponent moves
+def ponder(board: object, color: tuple, search: Callable[[object, SearchContext], Move], context: SearchContext,
+           results: Dict[int, Move]) -> None:
+    reply_color = BLACK if color == WHITE else WHITE
+    moves = get_all_moves(board, color)
+
+    # order the moves by a shallow search from the opponent's point of view, with more than one move
+    if len(moves) > 1:
+        scores = []
+        for move in moves:
+            board.make_move(move)
+            try:
+                scores.append(minimax(board, ORDER_DEPTH - 1, reply_color == WHITE, float('-inf'), float('inf'), context)[0])
+            finally:
+                board.unmake_move(move)
+        order = sorted(range(len(moves)), key=lambda i: scores[i], reverse=color == WHITE)
+        moves = [moves[i] for i in order]
+
+    for move in moves:
+        board.make_move(move)
+        try:
+            reply_context = SearchContext(context.table, ordering=MoveOrdering(), tablebase=context.tablebase,
+                                          quiescence=context.quiescence, cancel=context.cancel, weights=context.weights)
+            reply = search(board, reply_context)
+            context.nodes += reply_context.nodes
+            # iterative deepening returns its last iteration when it's cancelled, which isn't the full search
+            if context.cancel is not None and context.cancel.is_set():
+                raise SearchTimeout
+            results[board.get_hash(reply_color)] = reply
+        finally:
+            board.unmake_move(move)
@@ -0,0 +1,360 @@
+import json
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from checkers.squares import DIRECTIONS, RAYS, ROWCOL, SQUARES
+from checkers.constants import ROWS
+from minimax.tablebase import C, MAX_DISTANCE, PIECES, WHITE_MAN_OFFSET, materials, men_offsets, table_size
+
+# Retrograde solver of the endgame tablebase, see minimax.tablebase for its tables. The positions of a table are
+# handled a chunk at a time with numpy, as arrays of the squares of each group of pieces (white men, white kings,
+# black men, black kings), every group sorted by square. Every position is first searched one move ahead:
+# moves that capture or promote lead to an already solved table, the moves within the table are only counted and
+# positions without moves are lost. Then the results are spread backwards by taking back moves within the table,
+# in order of the distance to the end, so that a won position gets its shortest win and a lost one its longest loss
+
+# positions handled at once
+CHUNK = 1 << 15
+
+# what stands on the squares of a position, seen from the side to move. The square after the end of every
+# diagonal is a wall, so that walking a diagonal always stops
+EMPTY, OWN_MAN, OWN_KING, OPPONENT_MAN, OPPONENT_KING, WALL = range(6)
+
+BINOMIAL = np.array(C, dtype=np.int64)
+
+# the squares of the diagonals going out of every square, in the order of DIRECTIONS, followed by the wall
+RAY = np.full((SQUARES, len(DIRECTIONS), 10), SQUARES, dtype=np.int64)
+for origin, rays in enumerate(RAYS):
+    for direction, ray in enumerate(rays):
+        RAY[origin, direction, :len(ray)] = ray
+
+# directions men of each side move in, white (0) up the board and black (1) down, and the squares they promote on
+FORWARD = ([direction for direction, (row, _) in enumerate(DIRECTIONS) if row == -1],
+           [direction for direction, (row, _) in enumerate(DIRECTIONS) if row == 1])
+PROMOTION = np.array([[row == 0 for row, _ in ROWCOL] + [False], [row == ROWS - 1 for row, _ in ROWCOL] + [False]])
+
+# no win through the moves out of the table, and a move out of the table that doesn't lose
+NO_WIN = 0
+DRAWN = 255
+# above every distance, while the shortest win is looked for
+UNKNOWN = 1024
+
+
+@lru_cache(maxsize=None)
+def _offsets(white_men: int, black_men: int) -> np.ndarray:
+    return np.array(men_offsets(white_men, black_men), dtype=np.int64)
+
+
+# the sets of the ranks as (N, k) arrays of sorted free squares, see minimax.tablebase._rank
+def unrank(ranks: np.ndarray, k: int) -> np.ndarray:
+    squares = np.empty((len(ranks), k), dtype=np.int64)
+    for j in range(k, 0, -1):
+        square = np.searchsorted(BINOMIAL[:, j], ranks, side='right') - 1
+        squares[:, j - 1] = square
+        ranks = ranks - BINOMIAL[square, j]
+    return squares
+
+
+# turns the numbers of free squares into squares of the board, skipping the taken squares
+def expand(free: np.ndarray, taken: np.ndarray) -> np.ndarray:
+    squares = free.copy()
+    for column in np.sort(taken, axis=1).T:
+        squares += column[:, None] <= squares
+    return squares
+
+
+# ranks of the sets of sorted squares, every square counted among the squares from offset up that aren't taken
+def rank(squares: np.ndarray, taken: np.ndarray, offset: int = 0) -> np.ndarray:
+    free = squares - offset
+    if taken.shape[1]:
+        free = free - (taken[:, None, :] < squares[:, :, None]).sum(axis=2)
+    return BINOMIAL[free, np.arange(1, squares.shape[1] + 1)].sum(axis=1)
+
+
+# indexes of the positions of the groups in the table of the material, like minimax.tablebase.index
+def indexes(groups: List[np.ndarray], black: int, material: Tuple[int, int, int, int]) -> np.ndarray:
+    white_men, white_kings, black_men, black_kings = groups
+    free = SQUARES - material[0] - material[2]
+    men = np.concatenate([white_men, black_men], axis=1)
+    i = _offsets(material[0], material[2])[rank(white_men, men[:, :0], WHITE_MAN_OFFSET)] + rank(black_men, white_men)
+    i = i * C[free][material[1]] + rank(white_kings, men)
+    i = i * C[free - material[1]][material[3]] + rank(black_kings, np.concatenate([men, white_kings], axis=1))
+    return i * 2 + black
+
+
+# the groups of the positions of the indexes in the table of the material, all of them with the same side to move
+def positions(i: np.ndarray, material: Tuple[int, int, int, int]) -> List[np.ndarray]:
+    white_men, white_kings, black_men, black_kings = material
+    free = SQUARES - white_men - black_men
+    i, black_kings_rank = np.divmod(i // 2, C[free - white_kings][black_kings])
+    i, white_kings_rank = np.divmod(i, C[free][white_kings])
+    offsets = _offsets(white_men, black_men)
+    white_men_rank = np.searchsorted(offsets, i, side='right') - 1
+    white_men = unrank(white_men_rank, white_men) + WHITE_MAN_OFFSET
+    black_men = expand(unrank(i - offsets[white_men_rank], black_men), white_men)
+    men = np.concatenate([white_men, black_men], axis=1)
+    white_kings = expand(unrank(white_kings_rank, white_kings), men)
+    black_kings = expand(unrank(black_kings_rank, black_kings), np.concatenate([men, white_kings], axis=1))
+    return [white_men, white_kings, black_men, black_kings]
+
+
+# the squares of the positions seen from the side to move, black (1) or white (0)
+def squares(groups: List[np.ndarray], black: int) -> np.ndarray:
+    board = np.zeros((len(groups[0]), SQUARES + 1), dtype=np.int8)
+    board[:, SQUARES] = WALL
+    codes = (OWN_MAN, OWN_KING, OPPONENT_MAN, OPPONENT_KING)
+    rows = np.arange(len(board))[:, None]
+    for group, code in zip(groups, codes[2:] + codes[:2] if black else codes):
+        board[rows, group] = code
+    return board
+
+
+# what stands on the squares of every board, one square or a row of them per board
+def at(board: np.ndarray, squares: np.ndarray) -> np.ndarray:
+    base = np.arange(len(board)) * board.shape[1]
+    return board.ravel()[base.reshape((-1,) + (1,) * (squares.ndim - 1)) + squares]
+
+
+# Every skip of the pieces standing on the squares of the boards: the board it's made on, the landing square
+# and the square of the skipped piece. A man skips the piece right next to it, a king any piece it reaches
+# along a diagonal and lands on any empty square behind it. Also returns the number of empty squares
+# in front of the pieces in every direction
+def skips(board: np.ndarray, square: np.ndarray, king: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    rows = np.arange(len(board))
+    last = RAY.shape[2] - 1
+    found = ([], [], [])
+    runs = np.empty((len(board), len(DIRECTIONS)), dtype=np.int64)
+    for direction in range(len(DIRECTIONS)):
+        ray = RAY[square, direction]
+        codes = at(board, ray)
+        first = runs[:, direction] = np.argmax(codes != EMPTY, axis=1)
+        target = codes[rows, first]
+        valid = ((target == OPPONENT_MAN) | (target == OPPONENT_KING)) & (king | (first == 0))
+        valid &= codes[rows, np.minimum(first + 1, last)] == EMPTY
+        # only the few boards with a skip walk on to the landing squares
+        skipping = np.flatnonzero(valid)
+        if not len(skipping):
+            continue
+        ray, codes, first, long = ray[skipping], codes[skipping], first[skipping], king[skipping]
+        valid = np.ones(len(skipping), dtype=bool)
+        for step in range(1, last + 1):
+            landing = np.minimum(first + step, last)
+            valid &= codes[np.arange(len(skipping)), landing] == EMPTY
+            if step > 1:
+                valid &= long
+            if not valid.any():
+                break
+            found[0].append(skipping[valid])
+            found[1].append(ray[valid, landing[valid]])
+            found[2].append(ray[valid, first[valid]])
+    return tuple(np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64) for parts in found) + (runs,)
+
+
+# Finds the results of all moves out of the table of the positions, which all have the same side to move. Returns
+# for every position whether it has to skip, its number of moves within the table, the shortest win through
+# the moves out of it (NO_WIN without such a win) and the longest loss through them (DRAWN if one of them doesn't lose)
+def search(groups: List[np.ndarray], black: int, material: Tuple[int, int, int, int],
+           tables: Dict[Tuple[int, int, int, int], np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    count = len(groups[0])
+    board = squares(groups, black)
+    own = (groups[2], groups[3]) if black else (groups[0], groups[1])
+    rows = np.arange(count)
+
+    # the first skip of every piece, only the boards of the pieces that skip are copied to follow their multi-jumps
+    first = []
+    runs = []
+    for group, king in zip(own, (False, True)):
+        for column in group.T:
+            state, landing, skipped, run = skips(board, column, np.full(count, king))
+            first.append((state, column[state], landing, skipped, np.full(len(state), king)))
+            runs.append(run)
+    position, origin, square, skipped, king = (np.concatenate(parts) for parts in zip(*first))
+    skipping = np.zeros(count, dtype=bool)
+    skipping[position] = True
+    boards = board[position]
+    # the piece may pass its own square during a multi-jump
+    boards[np.arange(len(boards)), origin] = EMPTY
+    men_taken = np.zeros(len(position), dtype=np.int64)
+    kings_taken = np.zeros(len(position), dtype=np.int64)
+
+    # children are the positions after the moves out of the table, with the key of their material, see _lookup
+    children = []
+    while len(position):
+        taken = boards[np.arange(len(boards)), skipped]
+        men_taken += taken == OPPONENT_MAN
+        kings_taken += taken == OPPONENT_KING
+        boards[np.arange(len(boards)), skipped] = EMPTY
+        state, landing, skipped, _ = skips(boards, square, king)
+        ended = np.ones(len(position), dtype=bool)
+        ended[state] = False
+        if ended.any():
+            promotion = ~king[ended] & PROMOTION[black, square[ended]]
+            ended_boards = boards[ended]
+            ended_boards[np.arange(len(ended_boards)), square[ended]] = np.where(king[ended] | promotion, OWN_KING, OWN_MAN)
+            children.append((position[ended], ended_boards, promotion + 2 * (men_taken[ended] + 4 * kings_taken[ended])))
+        position, king, men_taken, kings_taken = position[state], king[state], men_taken[state], kings_taken[state]
+        square, boards = landing, boards[state]
+
+    # positions without a skip move their men forward and their kings along the diagonals
+    quiet = ~skipping
+    moves = np.zeros(count, dtype=np.int64)
+    men, kings = own
+    for j in range(men.shape[1]):
+        for direction in FORWARD[black]:
+            target = RAY[men[:, j], direction, 0]
+            valid = quiet & (runs[j][:, direction] > 0)
+            promotion = valid & PROMOTION[black, target]
+            moves += valid & ~promotion
+            if promotion.any():
+                boards = board[promotion]
+                boards[np.arange(len(boards)), men[promotion, j]] = EMPTY
+                boards[np.arange(len(boards)), target[promotion]] = OWN_KING
+                children.append((rows[promotion], boards, np.ones(len(boards), dtype=np.int64)))
+    for run in runs[men.shape[1]:]:
+        moves += np.where(quiet, run.sum(axis=1), 0)
+
+    win = np.full(count, UNKNOWN, dtype=np.int16)
+    longest = np.zeros(count, dtype=np.int16)
+    for position, value in _lookup(children, black, material, tables):
+        lost = value & 1 == 1
+        np.minimum.at(win, position[lost], value[lost] + 1)
+        won = ~lost & (value > 0)
+        np.maximum.at(longest, position[won], value[won])
+        longest[position[value == 0]] = DRAWN
+    win[win == UNKNOWN] = NO_WIN
+    return skipping, moves, win, longest
+
+
+# Values of the boards after the moves out of the table, for the opponent of the side to move in the boards.
+# The key of a board is whether the moved man was promoted plus twice the number of the captured men and
+# 8 times the number of the captured kings. Boards are looked up by their material, so that the pieces
+# of each material can be read into arrays of the same size
+def _lookup(children: List[Tuple[np.ndarray, np.ndarray, np.ndarray]], black: int, material: Tuple[int, int, int, int],
+            tables: Dict[Tuple[int, int, int, int], np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    if not children:
+        return []
+    position, boards, keys = (np.concatenate(parts) for parts in zip(*children))
+    own_men, own_kings, opponent_men, opponent_kings = material[2:] + material[:2] if black else material
+    # order of the groups of the pieces of every code, white men, white kings, black men and black kings
+    order = np.zeros(WALL, dtype=np.int64)
+    order[[OPPONENT_MAN, OPPONENT_KING, OWN_MAN, OWN_KING] if black else [OWN_MAN, OWN_KING, OPPONENT_MAN, OPPONENT_KING]] = range(4)
+    results = []
+    for key in np.unique(keys):
+        selected = keys == key
+        promotion, men_taken, kings_taken = key & 1, key >> 1 & 3, key >> 3
+        own = (own_men - promotion, own_kings + promotion)
+        opponent = (opponent_men - men_taken, opponent_kings - kings_taken)
+        # a side without pieces has lost
+        if not sum(opponent):
+            results.append((position[selected], np.ones(np.count_nonzero(selected), dtype=np.int16)))
+            continue
+        child = tuple(int(pieces) for pieces in (opponent + own if black else own + opponent))
+        # the squares of all pieces of every board, sorted by their group and then by square
+        selected_boards = boards[selected]
+        pieces = np.nonzero(selected_boards[:, :SQUARES])[1].reshape(len(selected_boards), sum(child))
+        pieces = np.take_along_axis(pieces, np.argsort(order[at(selected_boards, pieces)], axis=1, kind='stable'), axis=1)
+        groups = np.split(pieces, np.cumsum(child)[:-1], axis=1)
+        values = tables[child][indexes(groups, 1 - black, child)]
+        results.append((position[selected], values.astype(np.int16)))
+    return results
+
+
+# Indexes of the positions that lead to the positions of the indexes, all with the same side to move, with a move
+# that doesn't capture or promote. The moves are taken back by the side that isn't to move
+def parents(i: np.ndarray, black: int, material: Tuple[int, int, int, int]) -> np.ndarray:
+    groups = positions(i, material)
+    parent = 1 - black
+    board = squares(groups, black)
+    rows = np.arange(len(i))
+    found = []
+    men, kings = (2, 3) if parent else (0, 1)
+
+    # men move forward, so they came from behind
+    for j in range(groups[men].shape[1]):
+        for direction in FORWARD[black]:
+            origin = RAY[groups[men][:, j], direction, 0]
+            valid = at(board, origin) == EMPTY
+            if valid.any():
+                moved = [group[valid] for group in groups]
+                moved[men] = moved[men].copy()
+                moved[men][:, j] = origin[valid]
+                moved[men].sort(axis=1)
+                found.append(indexes(moved, parent, material))
+    for j in range(groups[kings].shape[1]):
+        for direction in range(len(DIRECTIONS)):
+            valid = np.ones(len(i), dtype=bool)
+            for step in range(RAY.shape[2] - 1):
+                origin = RAY[groups[kings][:, j], direction, step]
+                valid &= at(board, origin) == EMPTY
+                if not valid.any():
+                    break
+                moved = [group[valid] for group in groups]
+                moved[kings] = moved[kings].copy()
+                moved[kings][:, j] = origin[valid]
+                moved[kings].sort(axis=1)
+                found.append(indexes(moved, parent, material))
+    return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+
+# solves the table of a single material with the solved tables of the materials it leads to
+def solve(material: Tuple[int, int, int, int], tables: Dict[Tuple[int, int, int, int], np.ndarray]) -> np.ndarray:
+    size = table_size(material)
+    values = np.zeros(size, dtype=np.uint8)
+    # distance of the best result found so far plus one, the same as in values, that isn't final yet
+    pending = np.zeros(size, dtype=np.int16)
+    # moves within the table whose results aren't known yet
+    remaining = np.zeros(size, dtype=np.int16)
+    # longest loss through the moves out of the table, DRAWN if a move out of the table doesn't lose
+    longest = np.zeros(size, dtype=np.int16)
+    # positions where the side to move can skip, moves can't be taken back into them when they had to skip
+    skipping = np.zeros(size, dtype=bool)
+
+    for black in (0, 1):
+        for start in range(black, size, 2 * CHUNK):
+            i = np.arange(start, min(start + 2 * CHUNK, size), 2)
+            skips, moves, win, loss = search(positions(i, material), black, material, tables)
+            skipping[i], remaining[i], longest[i] = skips, moves, loss
+            # a position without moves is lost, a win through a move out of the table is known
+            # and so is a loss when every move leads out of the table
+            pending[i] = np.where(win != NO_WIN, win, np.where((moves == 0) & (loss != DRAWN), loss + 1, 0))
+
+    distance = 0
+    while distance < pending.max():
+        if distance > MAX_DISTANCE:
+            raise ValueError(f'distance of {material} is too long for the tablebase')
+        frontier = np.flatnonzero((pending == distance + 1) & (values == 0))
+        values[frontier] = distance + 1
+        for black in (0, 1):
+            sided = frontier[frontier & 1 == black]
+            for start in range(0, len(sided), CHUNK):
+                found = parents(sided[start:start + CHUNK], black, material)
+                found = found[(values[found] == 0) & ~skipping[found]]
+                # a lost position makes every position that can move into it won
+                if not distance & 1:
+                    found = found[(pending[found] == 0) | (pending[found] > distance + 2)]
+                    pending[found] = distance + 2
+                # a position where every move leads to a won position for the opponent is lost
+                else:
+                    np.subtract.at(remaining, found, 1)
+                    found = np.unique(found)
+                    found = found[(remaining[found] == 0) & (pending[found] == 0) & (longest[found] != DRAWN)]
+                    pending[found] = np.maximum(longest[found], distance + 1) + 1
+        distance += 1
+    return values
+
+
+# Builds the tables of all materials up to the passed number of pieces, solved tables are used by the next ones
+def generate(pieces: int = PIECES, log: bool = False) -> Dict[Tuple[int, int, int, int], np.ndarray]:
+    tables = {}
+    for material in materials(pieces):
+        start = perf_counter()
+        tables[material] = solve(material, tables)
+        if log:
+            values = tables[material]
+            print(json.dumps({'material': material, 'size': len(values), 'time': perf_counter() - start,
+                              'wins': int(np.count_nonzero((values > 0) & (values & 1 == 0))),
+                              'losses': int(np.count_nonzero(values & 1))}), flush=True)
+    return tables
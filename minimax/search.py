@@ -0,0 +1,75 @@
+from concurrent.futures import Executor
+from time import perf_counter
+from checkers.weights import WEIGHTS, Weights
+from minimax.algorithm import SearchContext, SearchResult, SearchTimeout, get_all_moves, probe_root, search_root
+from minimax.ordering import MoveOrdering
+from minimax.parallel import parallel_search
+from minimax.selection import MoveSelector
+from minimax.tablebase import Tablebase
+from minimax.transposition import TranspositionTable
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# deepest iteration the search is allowed to start
+MAX_DEPTH = 64
+
+
+# Iterative deepening driver of minimax. Searches depth 1, 2, 3... until the time budget (in seconds) is used up
+# or max_depth is reached and returns the result of the deepest completed iteration, searched in parallel if an executor
+# is passed. The search gets either a context, which has to have a table, or its table, tablebase, quiescence and weights.
+# Raises SearchTimeout if the context is cancelled before the first iteration has finished
+def iterative_deepening(board: object, max_player: bool, movetime: float, max_depth: int = MAX_DEPTH,
+                        table: TranspositionTable = None, executor: Executor = None, selector: MoveSelector = None,
+                        tablebase: Tablebase = None, quiescence: bool = None, context: SearchContext = None,
+                        weights: Weights = None) -> SearchResult:
+    start = perf_counter()
+    if context is None:
+        context = SearchContext(table if table is not None else TranspositionTable(), tablebase=tablebase,
+                                quiescence=quiescence if quiescence is not None else True,
+                                weights=weights if weights is not None else WEIGHTS)
+    elif any(argument is not None for argument in (table, tablebase, quiescence, weights)):
+        raise TypeError('iterative_deepening takes either a context or a table, tablebase, quiescence and weights')
+    if context.ordering is None:
+        context.ordering = MoveOrdering()
+    if context.stats is not None:
+        context.stats.begin(context)
+    context.table.new_search()
+
+    # with a single legal move there is nothing to search
+    moves = get_all_moves(board, WHITE if max_player else BLACK)
+    if len(moves) <= 1:
+        context.best = SearchResult(board.evaluate(context.weights), moves[0] if moves else None, 0, 0, perf_counter() - start)
+        return context.best
+    # nor with a root in the tablebase, which has the exact result of every move
+    probed = probe_root(board, max_player, context, selector)
+    if probed is not None:
+        context.best = SearchResult(*probed, 0, 0, perf_counter() - start)
+        return context.best
+
+    result = None
+    for depth in range(1, max_depth + 1):
+        try:
+            if executor is not None:
+                value, move = parallel_search(board, depth, max_player, executor, context, result.move if result else None, selector)
+            else:
+                value, move = search_root(board, depth, max_player, context, selector)
+        except SearchTimeout:
+            # the aborted iteration may have left its best move so far, the deepest finished one is the result
+            context.best = result
+            break
+        result = SearchResult(value, move, depth, context.nodes, perf_counter() - start)
+        context.best = result
+        # the root search has finished the statistics of the iteration already
+        if context.stats is not None:
+            context.stats.iteration(depth, value, context.nodes, result.time)
+
+        # the first iteration always finishes so that there is a move to make, the rest only within the budget
+        context.deadline = start + movetime
+        # once the game is decided a deeper search won't change the result
+        if value in (float('inf'), float('-inf')) or perf_counter() > context.deadline:
+            break
+
+    if result is None:
+        raise SearchTimeout
+    return result
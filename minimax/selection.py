@@ -0,0 +1,31 @@
+from random import Random
+from typing import List, Tuple
+from checkers.move import Move
+
+# default margin of evaluation within which root moves are considered as good as the best one
+MARGIN = 0.2
+
+
+# Picks the move to make from the evaluated root moves, so that the AI doesn't play the same game every time.
+# Any move evaluated within margin of the best one can be picked, with a seedable random generator.
+# With a margin of 0 the first best move is always picked and the AI is fully deterministic
+class MoveSelector:
+    def __init__(self, seed: int = None, margin: float = MARGIN) -> None:
+        self.margin = margin
+        self.random = Random(seed)
+
+    # picks one of the (evaluation, move) pairs, evaluations further than margin from the best may be only bounds
+    def choose(self, scores: List[Tuple[float, Move]], max_player: bool) -> Tuple[float, Move]:
+        if max_player:
+            best = max(evaluation for evaluation, _ in scores)
+            candidates = [score for score in scores if score[0] > best - self.margin]
+        else:
+            best = min(evaluation for evaluation, _ in scores)
+            candidates = [score for score in scores if score[0] < best + self.margin]
+
+        if not self.margin or not candidates:
+            return next(score for score in scores if score[0] == best)
+        # the candidates are picked from in the order of their moves, not the one they were searched in, which depends
+        # on the transposition table, so the same seed picks the same move however the table was filled
+        candidates.sort(key=lambda score: (score[1].path, score[1].captured))
+        return self.random.choice(candidates)
@@ -0,0 +1,177 @@
+import argparse
+import json
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from checkers.board import Board
+from checkers.notation import BLACK_WON, DRAW, WHITE_WON, GameLog, encode, game_records
+from checkers.weights import WEIGHTS, load_weights
+from minimax.algorithm import SearchContext, get_all_moves, search_root
+from minimax.ordering import MoveOrdering
+from minimax.search import iterative_deepening
+from minimax.selection import MARGIN, MoveSelector
+from minimax.transposition import TranspositionTable
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# games longer than this many moves are adjudicated as a draw
+MAX_MOVES = 300
+
+# settings of one of the engines playing each other: the search depth, or the deepest iteration if there is
+# a time budget per move (in seconds), the margin of the random choice between moves, whether it uses quiescence
+# and the weights of its evaluation
+Config = namedtuple('Config', ['depth', 'movetime', 'margin', 'quiescence', 'weights'], defaults=[3, None, MARGIN, True, WEIGHTS])
+
+
+# searches the move of an engine with its settings
+def engine_move(board: object, config: Config, max_player: bool, table: TranspositionTable, selector: MoveSelector) -> object:
+    if config.movetime:
+        return iterative_deepening(board, max_player, config.movetime, config.depth, table, selector=selector,
+                                   quiescence=config.quiescence, weights=config.weights).move
+    table.new_search()
+    context = SearchContext(table, ordering=MoveOrdering(), quiescence=config.quiescence, weights=config.weights)
+    return search_root(board, config.depth, max_player, context, selector)[1]
+
+
+# Plays a single game between the engines without any window and returns its result.
+# Every engine has its own transposition table and random generator seeded with the game's seed,
+# so a game can be replayed by playing it again with the same seed.
+# If record is set, the result has the game log records of every position of the game under 'records'
+def play_game(white: Config, black: Config, seed: int, max_moves: int = MAX_MOVES, record: bool = False, game: int = 0) -> dict:
+    start = perf_counter()
+    board = Board()
+    engines = {
+        WHITE: (white, TranspositionTable(1 << 16), MoveSelector(seed, white.margin)),
+        BLACK: (black, TranspositionTable(1 << 16), MoveSelector(seed + 1, black.margin)),
+    }
+    turn = WHITE
+    winner = None
+    moves = 0
+    positions = []
+    while True:
+        # the side to move loses if it has no pieces or no moves left
+        if not get_all_moves(board, turn):
+            winner = BLACK if turn == WHITE else WHITE
+            break
+        if board.is_tie() or moves >= max_moves:
+            break
+        if record:
+            positions.append(encode(board, turn))
+        config, table, selector = engines[turn]
+        board.make_move(engine_move(board, config, turn == WHITE, table, selector))
+        moves += 1
+        turn = BLACK if turn == WHITE else WHITE
+
+    result = {
+        'seed': seed,
+        'winner': 'white' if winner == WHITE else 'black' if winner == BLACK else None,
+        'moves': moves,
+        'white_left': board.white_left,
+        'black_left': board.black_left,
+        'time': perf_counter() - start,
+    }
+    if record:
+        result['records'] = game_records(positions, WHITE_WON if winner == WHITE else BLACK_WON if winner == BLACK else DRAW, game)
+    return result
+
+
+# plays game number index of a match, the engines swap colors every game
+def play_match_game(a: Config, b: Config, index: int, seed: int, max_moves: int = MAX_MOVES, record: bool = False) -> dict:
+    a_white = index % 2 == 0
+    white, black = (a, b) if a_white else (b, a)
+    result = play_game(white, black, seed + 2 * index, max_moves, record, index)
+    result['game'] = index
+    result['a_color'] = 'white' if a_white else 'black'
+    if result['winner'] is None:
+        result['result'] = 'draw'
+    else:
+        result['result'] = 'a' if result['winner'] == result['a_color'] else 'b'
+    return result
+
+
+# Returns wins, draws and losses of engine a with its score and the elo difference to engine b,
+# both with the bounds of their confidence interval (1.96 standard errors is 95%)
+def summarize(results: list, z: float = 1.96) -> dict:
+    games = len(results)
+    wins = sum(result['result'] == 'a' for result in results)
+    draws = sum(result['result'] == 'draw' for result in results)
+    losses = games - wins - draws
+    summary = {'games': games, 'wins': wins, 'draws': draws, 'losses': losses}
+    if not games:
+        return summary
+
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    error = z * math.sqrt(variance / games)
+    low, high = max(score - error, 0.0), min(score + error, 1.0)
+    summary['score'] = score
+    summary['score_interval'] = (low, high)
+    summary['elo'] = elo(score)
+    summary['elo_interval'] = (elo(low), elo(high))
+    return summary
+
+
+# elo difference that corresponds to the expected score
+def elo(score: float) -> float:
+    if score <= 0:
+        return float('-inf')
+    if score >= 1:
+        return float('inf')
+    return -400 * math.log10(1 / score - 1)
+
+
+# Plays a match of the passed number of games between the engines in worker processes.
+# Every finished game is written to the output file as a JSON line right away, so a long match
+# can be followed and its results are kept if it is stopped. If a log is passed, the positions of every
+# finished game are appended to it as a binary game log. Returns the summary of the match
+def run(a: Config, b: Config, games: int, workers: int = None, seed: int = 0, output: str = None, max_moves: int = MAX_MOVES,
+        log: str = None) -> dict:
+    results = []
+    file = open(output, 'a') if output else None
+    game_log = GameLog(log) if log else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_match_game, a, b, index, seed, max_moves, game_log is not None) for index in range(games)]
+            for future in as_completed(futures):
+                result = future.result()
+                if game_log is not None:
+                    game_log.append(result.pop('records'))
+                results.append(result)
+                if file is not None:
+                    file.write(json.dumps(result) + '\n')
+                    file.flush()
+    finally:
+        if file is not None:
+            file.close()
+        if game_log is not None:
+            game_log.close()
+    return summarize(results)
+
+
+# Headless self-play between two engine settings, prints the summary of the match as JSON:
+# python -m minimax.selfplay -g 100 --depth-a 4 --depth-b 3
+# python -m minimax.selfplay -g 1000 -n 16 --movetime-a 0.1 --movetime-b 0.05 -o games.jsonl
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-g", "--games", help="number of games to play, default is 100", type=int, default=100)
+    parser.add_argument("-n", "--workers", help="number of processes playing the games, default is the number of cpus", type=int)
+    parser.add_argument("-s", "--seed", help="seed of the first game, default is 0", type=int, default=0)
+    parser.add_argument("-o", "--output", help="file the result of every game is appended to as a JSON line")
+    parser.add_argument("-l", "--log", help="binary game log the positions of every game are appended to")
+    parser.add_argument("--max-moves", help=f"moves after which a game is a draw, default is {MAX_MOVES}", type=int, default=MAX_MOVES)
+    for name in ('a', 'b'):
+        parser.add_argument(f"--depth-{name}", help=f"search depth of engine {name}, the deepest iteration with a time budget, default is 3", type=int, default=3)
+        parser.add_argument(f"--movetime-{name}", help=f"time budget per move of engine {name} in seconds", type=float)
+        parser.add_argument(f"--margin-{name}", help=f"margin of the random move choice of engine {name}, default is {MARGIN}", type=float, default=MARGIN)
+        parser.add_argument(f"--no-quiescence-{name}", help=f"engine {name} evaluates the leaves without quiescence", action="store_true")
+        parser.add_argument(f"--weights-{name}", help=f"evaluation weights file of engine {name}, default are the built-in weights")
+    args = parser.parse_args()
+
+    a = Config(args.depth_a, args.movetime_a, args.margin_a, not args.no_quiescence_a,
+               load_weights(args.weights_a) if args.weights_a else WEIGHTS)
+    b = Config(args.depth_b, args.movetime_b, args.margin_b, not args.no_quiescence_b,
+               load_weights(args.weights_b) if args.weights_b else WEIGHTS)
+    print(json.dumps(run(a, b, args.games, args.workers, args.seed, args.output, args.max_moves, args.log), indent=2))
@@ -0,0 +1,201 @@
+import json
+import logging
+from collections import Counter
+from time import perf_counter
+from typing import List
+
+from checkers.move import Move
+from checkers.notation import move_to_pdn
+from minimax.transposition import TranspositionTable
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+logger = logging.getLogger(__name__)
+
+# counters of the transposition table that are reported as the change during the search
+TABLE_COUNTERS = ('hits', 'misses', 'collisions', 'stores', 'replacements')
+
+
+# Board passed to the search instead of the real one when statistics are collected. It times the board methods
+# of every phase of the search and passes everything else to the real board. The moves made inside
+# move generation to follow multi-jumps are part of the move generation time
+class InstrumentedBoard:
+    def __init__(self, board: object, stats: 'SearchStats') -> None:
+        self.target = board
+        self.stats = stats
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self.target, name)
+
+    def get_valid_moves(self, color: tuple) -> tuple:
+        start = perf_counter()
+        try:
+            return self.target.get_valid_moves(color)
+        finally:
+            self.stats.phases['move_generation'] += perf_counter() - start
+
+    def make_move(self, move: Move) -> None:
+        start = perf_counter()
+        try:
+            self.target.make_move(move)
+        finally:
+            self.stats.phases['make_unmake'] += perf_counter() - start
+
+    def unmake_move(self, move: Move) -> None:
+        start = perf_counter()
+        try:
+            self.target.unmake_move(move)
+        finally:
+            self.stats.phases['make_unmake'] += perf_counter() - start
+
+    def evaluate(self, *args) -> float:
+        start = perf_counter()
+        try:
+            return self.target.evaluate(*args)
+        finally:
+            self.stats.phases['evaluation'] += perf_counter() - start
+
+
+# Statistics of a search, collected when it's passed to the search in its SearchContext. Without it the search
+# only checks that it's None, so it costs nothing. It counts the nodes of every ply, which move of a node caused
+# a cutoff, how many moves nodes have and how many of them were searched, the cutoffs and counters of the
+# transposition table and the time spent in move generation, making moves and evaluation. Iterative deepening
+# adds every finished iteration with its principal variation. The statistics can be exported as a dictionary,
+# JSON or a log message
+class SearchStats:
+    def __init__(self) -> None:
+        self.context = None
+        self.start = None
+        self.time = 0.0
+        self.nodes_by_ply = Counter()
+        # index of the move in the ordered moves that caused a cutoff
+        self.cutoffs = Counter()
+        # nodes whose moves were searched, the moves they had and the ones searched before a cutoff
+        self.expanded = 0
+        self.moves = 0
+        self.searched = 0
+        self.table_cutoffs = 0
+        self.tablebase_hits = 0
+        self.table_start = None
+        self.phases = Counter()
+        self.iterations = []
+        self.pv = []
+
+    # starts the clock and takes the counters of the table at the start of the first search with the context
+    def begin(self, context: object) -> None:
+        if self.start is None:
+            self.start = perf_counter()
+            self.context = context
+            if context.table is not None:
+                self.table_start = context.table.stats()
+
+    # Returns the board the search has to run on to time its phases, and begins the statistics with the first search.
+    # An already instrumented board is returned as it is
+    def attach(self, board: object, context: object) -> object:
+        self.begin(context)
+        if isinstance(board, InstrumentedBoard):
+            return board
+        return InstrumentedBoard(board, self)
+
+    # counts a node of minimax at the ply
+    def node(self, ply: int) -> None:
+        self.nodes_by_ply[ply] += 1
+
+    # counts a node whose moves are searched
+    def expand(self, moves: int) -> None:
+        self.expanded += 1
+        self.moves += moves
+        self.searched += moves
+
+    # counts a cutoff by the move with the index, the moves after it aren't searched
+    def cutoff(self, index: int, moves: int) -> None:
+        self.cutoffs[index] += 1
+        self.searched -= moves - index - 1
+
+    # Adds the statistics of a search made elsewhere, in a worker process of the parallel search, whose root is at the ply.
+    # The phases of workers searching at the same time add up, so they can take longer than the search
+    def merge(self, other: 'SearchStats', ply: int) -> None:
+        for node_ply, nodes in other.nodes_by_ply.items():
+            self.nodes_by_ply[node_ply + ply] += nodes
+        self.cutoffs.update(other.cutoffs)
+        self.expanded += other.expanded
+        self.moves += other.moves
+        self.searched += other.searched
+        self.table_cutoffs += other.table_cutoffs
+        self.tablebase_hits += other.tablebase_hits
+        self.phases.update(other.phases)
+
+    # records a finished search of the root to the depth, with its principal variation from the table
+    def finish(self, board: object, color: tuple, depth: int) -> None:
+        self.time = perf_counter() - self.start
+        if isinstance(board, InstrumentedBoard):
+            board = board.target
+        if self.context.table is not None:
+            self.pv = principal_variation(board, color, self.context.table, depth)
+
+    # records an iteration of iterative deepening, after its root search has finished
+    def iteration(self, depth: int, value: float, nodes: int, time: float) -> None:
+        self.iterations.append({
+            'depth': depth,
+            'value': value,
+            'nodes': nodes,
+            'time': time,
+            'pv': [move_to_pdn(move) for move in self.pv],
+        })
+
+    # returns all statistics as a dictionary that can be written as JSON
+    def to_dict(self) -> dict:
+        nodes = self.context.nodes if self.context is not None else 0
+        cutoffs = sum(self.cutoffs.values())
+        phases = {phase: self.phases[phase] for phase in ('move_generation', 'make_unmake', 'evaluation')}
+        # everything else: move ordering, the transposition table, the tablebase and the search itself
+        phases['search'] = max(self.time - sum(phases.values()), 0.0)
+        result = {
+            'nodes': nodes,
+            'qnodes': self.context.qnodes if self.context is not None else 0,
+            'nodes_by_ply': [self.nodes_by_ply[ply] for ply in range(max(self.nodes_by_ply, default=-1) + 1)],
+            'time': self.time,
+            'nodes_per_sec': nodes / self.time if self.time else 0.0,
+            'moves_per_node': self.moves / self.expanded if self.expanded else 0.0,
+            'branching_factor': self.searched / self.expanded if self.expanded else 0.0,
+            'cutoffs': {str(index): count for index, count in sorted(self.cutoffs.items())},
+            'first_move_cutoffs': self.cutoffs[0] / cutoffs if cutoffs else 0.0,
+            'tablebase_hits': self.tablebase_hits,
+            'phases': phases,
+            'iterations': self.iterations,
+            'pv': [move_to_pdn(move) for move in self.pv],
+        }
+        if self.context is not None and self.context.table is not None:
+            table = self.context.table.stats()
+            result['table'] = {name: table[name] - self.table_start[name] for name in TABLE_COUNTERS}
+            probes = result['table']['hits'] + result['table']['misses']
+            result['table']['hit_rate'] = result['table']['hits'] / probes if probes else 0.0
+            result['table']['cutoffs'] = self.table_cutoffs
+            result['table']['fill'] = table['fill']
+        return result
+
+    def to_json(self, indent: int = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    # writes the statistics as a single JSON log message
+    def log(self, level: int = logging.INFO) -> None:
+        logger.log(level, 'search stats %s', self.to_json())
+
+
+# Follows the best moves stored in the table from the board, for as long as they are stored and valid,
+# but at most depth moves. The moves are made on the board and taken back, the table's counters aren't changed
+def principal_variation(board: object, color: tuple, table: TranspositionTable, depth: int) -> List[Move]:
+    pv = []
+    try:
+        for _ in range(depth):
+            entry = table.peek(board.get_hash(color))
+            if entry is None or entry.move is None or entry.move not in board.get_valid_moves(color)[0]:
+                break
+            board.make_move(entry.move)
+            pv.append(entry.move)
+            color = BLACK if color == WHITE else WHITE
+    finally:
+        for move in reversed(pv):
+            board.unmake_move(move)
+    return pv
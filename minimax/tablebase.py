@@ -0,0 +1,174 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from functools import lru_cache
+from itertools import accumulate, combinations, product
+from math import comb
+from typing import Dict, Iterator, List, Optional, Tuple
+from checkers.bitboard import BitBoard, bits, count
+from checkers.squares import SQUARES
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# Endgame tablebase of every position with up to a few pieces, made by retrograde analysis in minimax.retrograde.
+# Positions are grouped by their material, (white men, white kings, black men, black kings), and each group
+# is a table of one byte per position. A byte is 0 for a draw, otherwise the number of moves (plies)
+# until the side to move has no moves left, plus one. An odd byte is a loss of the side to move, an even one a win.
+# The tie rule of 30 king moves isn't part of the tables, a result is only used when it's reached before the tie
+
+# default largest number of pieces on the board
+PIECES = 4
+
+# score of a won position, minus the number of moves to the win so that the engine goes for the quickest one
+WIN = 1000
+
+# longest distance to the end of the game a byte can keep
+MAX_DISTANCE = 254
+
+# men can't stand on their promotion row, white men take squares 5-49 and black men squares 0-44
+MAN_SQUARES = 45
+WHITE_MAN_OFFSET = 5
+
+# file header, then one directory entry per table: its material, offset in the file and size
+MAGIC = b'DRT2'
+HEADER = struct.Struct('<4sI')
+DIRECTORY = struct.Struct('<4BQQ')
+
+# binomial coefficients of the combinatorial number system
+C = [[comb(n, k) for k in range(SQUARES + 1)] for n in range(SQUARES + 1)]
+
+
+# Positions of a material are ranked jointly, so that no index is left for two pieces on the same square:
+# white men take any of their squares, black men the squares of black men white men left free, white kings
+# the squares the men left free and black kings the ones left by all the other pieces. Each group of pieces
+# is ranked as a set of its free squares, in the combinatorial number system
+
+# rank of the sorted squares among all the sets of their size, every square counted among the squares
+# from offset up that aren't taken
+def _rank(squares: List[int], taken: List[int], offset: int = 0) -> int:
+    rank = 0
+    for k, square in enumerate(squares, 1):
+        rank += C[square - offset - sum(1 for other in taken if other < square)][k]
+    return rank
+
+
+# Offsets of the ranks of the black men for every rank of the white men. Black men have fewer free squares
+# the more white men stand outside of the black promotion row, so the number of their sets depends on the white men.
+# The last offset is the number of placements of all men
+@lru_cache(maxsize=None)
+def men_offsets(white_men: int, black_men: int) -> Tuple[int, ...]:
+    sizes = [0] * C[MAN_SQUARES][white_men]
+    for squares in combinations(range(MAN_SQUARES), white_men):
+        # white men in front of the black promotion row take squares black men could stand on
+        shared = sum(1 for square in squares if square < MAN_SQUARES - WHITE_MAN_OFFSET)
+        sizes[_rank(squares, ())] = C[MAN_SQUARES - shared][black_men]
+    return tuple(accumulate(sizes, initial=0))
+
+
+# number of positions of a material, with either side to move
+def table_size(material: Tuple[int, int, int, int]) -> int:
+    white_men, white_kings, black_men, black_kings = material
+    free = SQUARES - white_men - black_men
+    return men_offsets(white_men, black_men)[-1] * C[free][white_kings] * C[free - white_kings][black_kings] * 2
+
+
+# material of a position
+def material(white_men: int, white_kings: int, black_men: int, black_kings: int) -> Tuple[int, int, int, int]:
+    return count(white_men), count(white_kings), count(black_men), count(black_kings)
+
+
+# index of a position in the table of its material, a perfect hash of the pieces and the side to move
+def index(white_men: int, white_kings: int, black_men: int, black_kings: int, color: tuple) -> int:
+    white_men, white_kings = list(bits(white_men)), list(bits(white_kings))
+    black_men, black_kings = list(bits(black_men)), list(bits(black_kings))
+    men = white_men + black_men
+    free = SQUARES - len(men)
+    i = men_offsets(len(white_men), len(black_men))[_rank(white_men, (), WHITE_MAN_OFFSET)] + _rank(black_men, white_men)
+    i = i * C[free][len(white_kings)] + _rank(white_kings, men)
+    i = i * C[free - len(white_kings)][len(black_kings)] + _rank(black_kings, men + white_kings)
+    return i * 2 + (color == BLACK)
+
+
+# every material with pieces of both sides and at most the passed number of pieces. Captures only lead to
+# fewer pieces and promotions to fewer men, so each table only depends on the tables before it
+def materials(pieces: int) -> Iterator[Tuple[int, int, int, int]]:
+    found = [signature for signature in product(range(pieces + 1), repeat=4)
+             if sum(signature) <= pieces and signature[0] + signature[1] and signature[2] + signature[3]]
+    return iter(sorted(found, key=lambda signature: (sum(signature), signature[0] + signature[2], signature)))
+
+
+# writes the tables, bytes or arrays of bytes, into a single file: the header, the directory of the tables,
+# then the tables one after another
+def save(tables: Dict[Tuple[int, int, int, int], bytes], path: str) -> None:
+    offset = HEADER.size + DIRECTORY.size * len(tables)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(tables)))
+        for signature, values in tables.items():
+            file.write(DIRECTORY.pack(*signature, offset, len(values)))
+            offset += len(values)
+        for values in tables.values():
+            file.write(values)
+
+
+# Tablebase file opened for probing. The file is memory mapped, so only the parts of it that are probed are read
+class Tablebase:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, tables = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a tablebase file of this version, generate it again with python -m minimax.tablebase')
+        self.tables = {}
+        for entry in DIRECTORY.iter_unpack(self.data[HEADER.size:HEADER.size + DIRECTORY.size * tables]):
+            *signature, offset, size = entry
+            self.tables[tuple(signature)] = offset
+        self.pieces = max(map(sum, self.tables), default=0)
+        self.hits = 0
+
+    def close(self) -> None:
+        self.data.close()
+
+    # returns the byte of the position, or None if its material isn't in the tablebase
+    def probe(self, bitboard: BitBoard, color: tuple) -> Optional[int]:
+        masks = (bitboard.white_men, bitboard.white_kings, bitboard.black_men, bitboard.black_kings)
+        offset = self.tables.get(material(*masks))
+        if offset is None:
+            return None
+        return self.data[offset + index(*masks, color)]
+
+    # Returns the score of the board for minimax, or None if the position isn't in the tablebase or
+    # the tie rule could end the game before the result is reached. Won positions score WIN minus the distance to the end
+    def score(self, board: object, color: tuple) -> Optional[float]:
+        if board.white_left + board.black_left > self.pieces:
+            return None
+        bitboard = board if isinstance(board, BitBoard) else BitBoard.from_board(board)
+        value = self.probe(bitboard, color)
+        if value is None:
+            return None
+        self.hits += 1
+        if not value:
+            return 0.0
+        distance = value - 1
+        # the last move ends the game before the tie, every move before it can be a king move
+        if board.king_moves + distance > 30:
+            return None
+        score = WIN - distance if value & 1 == 0 else distance - WIN
+        return score if color == WHITE else -score
+
+
+# Generates the tablebase, prints the time and results of every table as JSON lines:
+# python -m minimax.tablebase -n 3 -o tablebase.bin
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--pieces", help=f"largest number of pieces on the board, default is {PIECES}", type=int, default=PIECES)
+    parser.add_argument("-o", "--output", help="tablebase file to write, default is tablebase.bin", default="tablebase.bin")
+    args = parser.parse_args()
+
+    # the solver needs numpy, probing the tablebase doesn't
+    from minimax.retrograde import generate
+    save(generate(args.pieces, log=True), args.output)
+    print(json.dumps({'output': args.output, 'size': os.path.getsize(args.output)}))
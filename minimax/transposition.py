@@ -0,0 +1,81 @@
+from collections import namedtuple
+
+# bound types of a stored evaluation: exact value, lower bound (search failed high), upper bound (search failed low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# a stored search result of a single position
+Entry = namedtuple('Entry', ['key', 'depth', 'flag', 'value', 'move', 'generation'])
+
+
+# Fixed size transposition table indexed by the zobrist hash of a position. Each slot keeps one entry,
+# a new entry replaces the old one if it's searched at least as deep, or the old one is left from an earlier search
+class TranspositionTable:
+    def __init__(self, size: int = 1 << 20) -> None:
+        # size is rounded down to a power of two, so that the slot is just the lowest bits of the hash
+        self.size = 1 << (size.bit_length() - 1)
+        self.mask = self.size - 1
+        self.clear()
+
+    # removes all entries and zeroes the counters
+    def clear(self) -> None:
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.replacements = 0
+
+    # marks the start of a new search, entries from earlier searches are replaced first
+    def new_search(self) -> None:
+        self.generation += 1
+
+    # returns the entry stored for the position's hash or None.
+    # A slot taken by a different position counts as a collision
+    def probe(self, key: int) -> Entry:
+        entry = self.entries[key & self.mask]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.key != key:
+            self.misses += 1
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return entry
+
+    # returns the entry stored for the position's hash or None, without counting it as a probe
+    def peek(self, key: int) -> Entry:
+        entry = self.entries[key & self.mask]
+        if entry is None or entry.key != key:
+            return None
+        return entry
+
+    # stores a search result of a position, if the replacement policy allows it
+    def store(self, key: int, depth: int, flag: int, value: float, move: object) -> None:
+        slot = key & self.mask
+        old = self.entries[slot]
+        if old is None:
+            self.used += 1
+        elif old.key != key and old.generation == self.generation and old.depth > depth:
+            return
+        elif old.key != key:
+            self.replacements += 1
+        self.entries[slot] = Entry(key, depth, flag, value, move, self.generation)
+        self.stores += 1
+
+    # returns counters of the table, hit rate and how much of it is in use
+    def stats(self) -> dict:
+        probes = self.hits + self.misses
+        return {
+            'size': self.size,
+            'used': self.used,
+            'fill': self.used / self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'replacements': self.replacements,
+        }
@@ -0,0 +1,149 @@
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import List, Tuple
+
+import numpy as np
+
+from checkers.bitboard import BitBoard
+from checkers.notation import BLACK_WON, DRAW, WHITE_WON
+from checkers.weights import WEIGHTS, Weights, load_weights, save_weights
+from minimax.batch import feature_matrix, load_log
+
+BLACK = (0,0,0)
+WHITE = (255, 255, 255)
+
+# Texel tuning of the evaluation weights. The positions of self-play game logs are labelled with the result of
+# their game (1 white won, 0.5 draw, 0 black lost) and the weights are fitted so that a logistic function of the
+# evaluation predicts the results, by minimizing the mean squared error of the predictions with a local search.
+# Only quiet positions are used, where the side to move has no skip, as the evaluation of the others is wrong
+# until the skips are made. The evaluation is linear in the weights, so the features of the positions are
+# computed once and every error is a single matrix product
+
+# score of the game results
+SCORES = {WHITE_WON: 1.0, DRAW: 0.5, BLACK_WON: 0.0}
+
+# records checked for quiet positions by a single task of a worker process
+CHUNK = 4096
+
+# first and smallest step the weights are changed by in the local search
+STEP = 1.0
+MIN_STEP = 0.01
+
+# penalty of moving the weights away from the starting ones, per squared relative change of a weight.
+# The distance term grows with the number of pieces, so it can take over the weight of the pieces
+# with hardly any change of the error, and without the penalty the weights drift far along that ridge
+REGULARIZATION = 1e-4
+
+
+# returns which of the records of a game log are quiet positions with moves left and without a tie
+def quiet_positions(records: np.ndarray) -> np.ndarray:
+    quiet = np.zeros(len(records), dtype=bool)
+    for index, (masks, flags) in enumerate(zip(records['masks'].tolist(), records['flags'].tolist())):
+        if flags >> 1 >= 30:
+            continue
+        bitboard = BitBoard(*masks, king_moves=flags >> 1)
+        if not bitboard.white_left or not bitboard.black_left:
+            continue
+        moves, skipping = bitboard.get_valid_moves(BLACK if flags & 1 else WHITE)
+        quiet[index] = bool(moves) and not skipping
+    return quiet
+
+
+# Loads the quiet positions of the game logs as the features of their evaluation and the scores of their results.
+# Positions are checked in worker processes, the logs are memory mapped and sent to them chunk by chunk
+def load_positions(paths: List[str], workers: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    records = np.concatenate([load_log(path) for path in paths])
+    chunks = [records[start:start + CHUNK] for start in range(0, len(records), CHUNK)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        quiet = np.concatenate(list(executor.map(quiet_positions, chunks))) if chunks else np.zeros(0, dtype=bool)
+    records = records[quiet]
+    results = np.array([SCORES[result] for result in records['result'].tolist()], dtype=np.float64)
+    return feature_matrix(records['masks']), results
+
+
+# mean squared error of the results predicted from the evaluations of the positions with the weights
+def error(features: np.ndarray, results: np.ndarray, weights: Weights, scale: float) -> float:
+    predictions = 1 / (1 + np.exp(-scale * (features @ np.array(weights))))
+    return float(np.mean((results - predictions) ** 2))
+
+
+# Finds the scale of the logistic function that fits the results best with the passed weights, it maps
+# evaluations to expected results. It's fitted once with the starting weights and then kept fixed,
+# otherwise the weights could be scaled down and the scale up without changing any prediction
+def fit_scale(features: np.ndarray, results: np.ndarray, weights: Weights, low: float = 1e-4, high: float = 1.0) -> float:
+    # golden section search on the logarithm of the scale
+    ratio = (5 ** 0.5 - 1) / 2
+    low, high = np.log(low), np.log(high)
+    for _ in range(60):
+        left = high - ratio * (high - low)
+        right = low + ratio * (high - low)
+        if error(features, results, weights, np.exp(left)) < error(features, results, weights, np.exp(right)):
+            high = right
+        else:
+            low = left
+    return float(np.exp((low + high) / 2))
+
+
+# the penalty of the regularization for the change of the weights from the starting ones
+def penalty(weights: Weights, start: Weights, regularization: float) -> float:
+    return regularization * sum(((weight - first) / (abs(first) or 1.0)) ** 2 for weight, first in zip(weights, start))
+
+
+# Local search of the weights: every weight is moved up and down by the step while that lowers the error
+# with the penalty, then the step is halved until it's smaller than min_step. Returns the tuned weights
+def tune(features: np.ndarray, results: np.ndarray, weights: Weights, scale: float, step: float = STEP,
+         min_step: float = MIN_STEP, regularization: float = REGULARIZATION) -> Weights:
+    start = weights
+    best = error(features, results, weights, scale)
+    while step >= min_step:
+        improved = True
+        while improved:
+            improved = False
+            for field in Weights._fields:
+                for delta in (step, -step):
+                    candidate = weights._replace(**{field: getattr(weights, field) + delta})
+                    candidate_error = error(features, results, candidate, scale) + penalty(candidate, start, regularization)
+                    if candidate_error < best:
+                        weights, best = candidate, candidate_error
+                        improved = True
+                        break
+        step /= 2
+    return weights
+
+
+# Tunes the evaluation weights on self-play game logs and writes them to a file, which main.py, selfplay
+# and batch take with their weights option. The tuned weights are best checked by playing them against the
+# starting ones at the same time per move:
+# python -m minimax.selfplay -g 2000 -l games.bin --margin-a 5 --margin-b 5
+# python -m minimax.tuning games.bin -o weights.json
+# python -m minimax.selfplay -g 400 --movetime-a 0.1 --movetime-b 0.1 --depth-a 20 --depth-b 20 --weights-a weights.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("logs", help="game logs written by python -m minimax.selfplay -l", nargs="+")
+    parser.add_argument("-o", "--output", help="file to write the tuned weights to, default is weights.json", default="weights.json")
+    parser.add_argument("-f", "--weights", help="weights file to start from, default are the built-in weights")
+    parser.add_argument("-n", "--workers", help="number of processes looking for the quiet positions, default is the number of cpus", type=int)
+    parser.add_argument("--min-step", help=f"smallest step of the local search, default is {MIN_STEP}", type=float, default=MIN_STEP)
+    parser.add_argument("-r", "--regularization", help=f"penalty of changing the weights, default is {REGULARIZATION}",
+                        type=float, default=REGULARIZATION)
+    args = parser.parse_args()
+
+    start = perf_counter()
+    weights = load_weights(args.weights) if args.weights else WEIGHTS
+    features, results = load_positions(args.logs, args.workers)
+    if not len(results):
+        raise SystemExit('the game logs have no quiet positions')
+    scale = fit_scale(features, results, weights)
+    tuned = tune(features, results, weights, scale, min_step=args.min_step, regularization=args.regularization)
+    save_weights(tuned, args.output)
+    print(json.dumps({
+        'positions': len(results),
+        'scale': scale,
+        'error': error(features, results, weights, scale),
+        'tuned_error': error(features, results, tuned, scale),
+        'weights': tuned._asdict(),
+        'output': args.output,
+        'time': perf_counter() - start,
+    }, indent=2))
@@ -0,0 +1,102 @@
+import unittest
+from random import Random
+from checkers.bitboard import BitBoard
+from checkers.board import Board
+from checkers.constants import BLACK, WHITE
+from checkers.squares import ROWCOL
+
+# number of random games played and the longest game, in plies
+GAMES = 30
+MAX_PLIES = 200
+SEED = 1
+
+
+# the moves as sorted tuples of everything that tells them apart, including the promotion
+def move_set(moves: list) -> list:
+    return sorted((move.path, move.captured, move.promotion) for move in moves)
+
+
+# everything make_move and unmake_move change on a Board, except its history
+def board_state(board: Board) -> tuple:
+    return (bytes(board.squares), board.hash, board.king_moves, board.white_left, board.black_left,
+            board.white_kings, board.black_kings, board.white_dist, board.black_dist)
+
+
+# the pieces and the tie counter of a BitBoard
+def bitboard_state(bitboard: BitBoard) -> tuple:
+    return bitboard.white_men, bitboard.white_kings, bitboard.black_men, bitboard.black_kings, bitboard.king_moves
+
+
+# Plays seeded random games on a Board and a BitBoard side by side. At every ply both have to generate the same moves,
+# and every move made and taken back on them has to leave them as they were
+class BitBoardEquivalenceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.random = Random(SEED)
+        # how often the games got to captures, multi-jumps, promotions and king moves, so that the test covers them
+        self.seen = {'captures': 0, 'multi_jumps': 0, 'promotions': 0, 'king_moves': 0}
+
+    # plays a random game and checks every ply with the passed function
+    def play(self, check) -> None:
+        board = Board()
+        bitboard = BitBoard.create_board()
+        color = WHITE
+        for _ in range(MAX_PLIES):
+            if board.is_tie():
+                break
+            moves, skipping = board.get_valid_moves(color)
+            check(board, bitboard, color, moves, skipping)
+            if not moves:
+                break
+            move = self.random.choice(moves)
+            board.make_move(move)
+            bitboard.make_move(move)
+            color = BLACK if color == WHITE else WHITE
+
+    def test_same_moves(self) -> None:
+        def check(board: Board, bitboard: BitBoard, color: tuple, moves: list, skipping: bool) -> None:
+            bitboard_moves, bitboard_skipping = bitboard.get_valid_moves(color)
+            self.assertEqual(move_set(moves), move_set(bitboard_moves))
+            self.assertEqual(skipping, bitboard_skipping)
+            self.assertEqual(bitboard_state(BitBoard.from_board(board)), bitboard_state(bitboard))
+            for move in moves:
+                self.seen['captures'] += bool(move.captured)
+                self.seen['multi_jumps'] += len(move.captured) > 1
+                self.seen['promotions'] += move.promotion
+                self.seen['king_moves'] += board.get_piece(*ROWCOL[move.start]).king
+
+        for _ in range(GAMES):
+            self.play(check)
+        for name, seen in self.seen.items():
+            self.assertGreater(seen, 0, f'the random games have no {name}')
+
+    def test_make_unmake(self) -> None:
+        def check(board: Board, bitboard: BitBoard, color: tuple, moves: list, skipping: bool) -> None:
+            before = board_state(board)
+            bitboard_before = bitboard_state(bitboard)
+            for move in moves:
+                board.make_move(move)
+                bitboard.make_move(move)
+                # the incrementally updated hash and counters have to match the ones counted from scratch
+                made = board_state(board)
+                board.recalculate()
+                self.assertEqual(made, board_state(board))
+                self.assertEqual(bitboard_state(BitBoard.from_board(board)), bitboard_state(bitboard))
+                board.unmake_move(move)
+                bitboard.unmake_move(move)
+                self.assertEqual(before, board_state(board))
+                self.assertEqual(board.hash, board.compute_hash())
+                self.assertEqual(bitboard_before, bitboard_state(bitboard))
+
+        for _ in range(GAMES):
+            self.play(check)
+
+    def test_to_board(self) -> None:
+        def check(board: Board, bitboard: BitBoard, color: tuple, moves: list, skipping: bool) -> None:
+            self.assertEqual(board_state(bitboard.to_board()), board_state(board))
+
+        for _ in range(GAMES):
+            self.play(check)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import tempfile
+import unittest
+from threading import Event, Timer
+from checkers.bitboard import BitBoard
+from checkers.board import Board
+from checkers.constants import BLACK, WHITE
+from checkers.notation import move_to_pdn
+from minimax.algorithm import SearchContext, SearchTimeout, minimax, search_root
+from minimax.background import BackgroundSearch
+from minimax.parallel import create_pool, parallel_search
+from minimax.selection import MoveSelector
+from minimax.tablebase import Tablebase, save
+from minimax.stats import SearchStats
+from minimax.search import iterative_deepening
+from minimax.transposition import TranspositionTable
+
+
+# white kings with so many moves that the first iteration searches more than the 64 nodes between the checks of the cancel token
+def kings_board() -> Board:
+    return BitBoard(white_kings=sum(1 << square for square in (21, 23, 26, 28)), black_kings=1).to_board()
+
+
+# a context whose search is cancelled before it starts
+def cancelled_context() -> SearchContext:
+    cancel = Event()
+    cancel.set()
+    return SearchContext(TranspositionTable(), cancel=cancel)
+
+
+class IterativeDeepeningTest(unittest.TestCase):
+    def test_finishes_first_iteration(self) -> None:
+        result = iterative_deepening(kings_board(), True, 0.0)
+        self.assertEqual(result.depth, 1)
+        self.assertIsNotNone(result.move)
+
+    def test_cancelled_before_first_iteration(self) -> None:
+        with self.assertRaises(SearchTimeout):
+            iterative_deepening(kings_board(), True, 1.0, context=cancelled_context())
+
+    # the search of the AI move in the window runs in a BackgroundSearch, which drops the move of a cancelled search
+    def test_cancelled_in_background(self) -> None:
+        board = kings_board()
+        search = BackgroundSearch(lambda context: iterative_deepening(board, True, 1.0, context=context).move,
+                                  cancelled_context())
+        search.thread.join()
+        self.assertTrue(search.cancelled)
+        self.assertIsNone(search.move)
+
+    def test_context_and_arguments(self) -> None:
+        with self.assertRaises(TypeError):
+            iterative_deepening(Board(), True, 0.1, table=TranspositionTable(), context=SearchContext(TranspositionTable()))
+        with self.assertRaises(TypeError):
+            iterative_deepening(Board(), True, 0.1, quiescence=False, context=SearchContext(TranspositionTable()))
+
+
+# searches at a fixed depth keep their best move in the context, for the progress shown in the title of the window
+class FixedDepthProgressTest(unittest.TestCase):
+    def check_best(self, context: SearchContext, value: float, move: object) -> None:
+        self.assertEqual(context.best.depth, 2)
+        self.assertEqual((context.best.value, context.best.move), (value, move))
+
+    def test_search_root(self) -> None:
+        context = SearchContext(TranspositionTable())
+        value, move = search_root(kings_board(), 2, True, context)
+        self.check_best(context, value, move)
+
+    def test_parallel_search(self) -> None:
+        context = SearchContext(TranspositionTable())
+        with create_pool(1) as pool:
+            value, move = parallel_search(kings_board(), 2, True, pool, context)
+        self.check_best(context, value, move)
+
+
+class ParallelCancelTest(unittest.TestCase):
+    # a cancelled search stops the moves its workers are searching, so the pool is free for the next search
+    def test_workers_stop(self) -> None:
+        context = SearchContext(TranspositionTable(), cancel=Event())
+        with create_pool(1) as pool:
+            Timer(0.5, context.cancel.set).start()
+            with self.assertRaises(SearchTimeout):
+                parallel_search(Board(), 30, True, pool, context)
+            self.assertEqual(pool.submit(abs, -1).result(timeout=5), 1)
+
+
+class ParallelStatsTest(unittest.TestCase):
+    # the statistics of a parallel search get the nodes the workers searched and the root stored in the table
+    def test_stats_of_workers(self) -> None:
+        context = SearchContext(TranspositionTable(), stats=SearchStats())
+        with create_pool(1) as pool:
+            _, move = parallel_search(Board(), 3, True, pool, context)
+        stats = context.stats.to_dict()
+        self.assertGreater(stats['nodes'], 0)
+        self.assertEqual(stats['nodes'], context.nodes)
+        self.assertEqual(sum(stats['nodes_by_ply']), context.nodes - context.qnodes)
+        self.assertEqual(stats['nodes_by_ply'][0], 1)
+        self.assertEqual(stats['pv'][0], move_to_pdn(move))
+
+
+class TieCounterTest(unittest.TestCase):
+    # a position searched early in the game comes back with the tie within the depth of the search,
+    # the table kept for the whole game mustn't give it the result of the earlier search
+    def test_table_near_tie(self) -> None:
+        board = BitBoard(white_kings=1 << 21 | 1 << 23, black_kings=1 << 4 | 1 << 40).to_board()
+        table = TranspositionTable()
+        self.assertNotEqual(minimax(board, 2, True, float('-inf'), float('inf'), SearchContext(table))[0], 0)
+        board.king_moves = 28
+        fresh = minimax(board, 2, True, float('-inf'), float('inf'), SearchContext(TranspositionTable()))[0]
+        self.assertEqual(fresh, 0)
+        self.assertEqual(minimax(board, 2, True, float('-inf'), float('inf'), SearchContext(table))[0], fresh)
+
+
+try:
+    from minimax.retrograde import generate
+except ImportError:
+    generate = None
+
+
+# a root in the tablebase gets its move from the tablebase, without a search
+@unittest.skipIf(generate is None, 'generating the tablebase needs numpy')
+class TablebaseRootTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, 'tablebase.bin')
+        save(generate(2), path)
+        cls.tablebase = Tablebase(path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def setUp(self) -> None:
+        # a white king winning against a black man in 3 moves
+        self.board = BitBoard(white_kings=1 << 21, black_men=1 << 35).to_board()
+        self.assertEqual(self.tablebase.score(self.board, WHITE), 997)
+
+    def test_search_root(self) -> None:
+        context = SearchContext(TranspositionTable(), tablebase=self.tablebase)
+        value, move = search_root(self.board, 4, True, context)
+        self.assertEqual(context.nodes, 1)
+        self.assertEqual(value, 998)
+        self.board.make_move(move)
+        self.assertEqual(self.tablebase.score(self.board, BLACK), value)
+
+    def test_iterative_deepening(self) -> None:
+        result = iterative_deepening(self.board, True, 1.0, tablebase=self.tablebase)
+        self.assertEqual((result.depth, result.value), (0, 998))
+
+
+class QuiescenceTest(unittest.TestCase):
+    # nodes and qnodes of a search of the board to the depth, with or without quiescence
+    def counters(self, board: Board, depth: int, quiescence: bool) -> tuple:
+        context = SearchContext(TranspositionTable(), quiescence=quiescence)
+        minimax(board, depth, True, float('-inf'), float('inf'), context)
+        return context.nodes, context.qnodes
+
+    # without skips at the leaves quiescence only evaluates them, so it doesn't count any nodes of its own
+    def test_leaves_without_skips(self) -> None:
+        self.assertEqual(self.counters(Board(), 1, True), self.counters(Board(), 1, False))
+        self.assertEqual(self.counters(Board(), 1, True)[1], 0)
+
+    def test_skips_are_counted(self) -> None:
+        nodes, qnodes = self.counters(Board(), 2, True)
+        self.assertGreater(qnodes, 0)
+        self.assertGreater(nodes, qnodes)
+
+
+class MoveSelectorTest(unittest.TestCase):
+    # pondered replies are searched with a table filled differently than the search of the move would, so the moves
+    # come in another order, and the seeded choice has to be the same anyway
+    def test_choice_independent_of_order(self) -> None:
+        scores = [(0.1 * i, move) for i, move in enumerate(Board().get_valid_moves(WHITE)[0])]
+        for seed in range(20):
+            choice = MoveSelector(seed, 1.0).choose(scores, True)
+            self.assertEqual(MoveSelector(seed, 1.0).choose(scores[::-1], True), choice)
+
+
+if __name__ == "__main__":
+    unittest.main()